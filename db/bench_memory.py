@@ -0,0 +1,85 @@
+"""
+Memory per planet for the pydantic models and for the compact records.
+
+    python -m db.bench_memory [planets]
+
+Builds a synthetic galaxy (1M planets by default, ~8 per system, a third of them with
+bio signals) once as pydantic Systems and once as CompactSystems, and reports what
+tracemalloc sees each of them hold on to.
+"""
+
+import gc
+import random
+import sys
+import tracemalloc
+from typing import Callable, Iterator
+
+from db.compact import CompactSystem, compact_system
+from db.galaxy import Planet, System
+from signals.rules import get_species_index
+from utils.values import HMCB, ICY, ROCKY, ROCKY_ICE, WATER_WORLD
+
+PLANETS_PER_SYSTEM = 8
+
+
+def synthetic_systems(planets: int, seed: int = 1) -> Iterator[System]:
+    rng = random.Random(seed)
+    for address in range(planets // PLANETS_PER_SYSTEM):
+        name = f"Eol Prou AB-C d{address}"
+        system = System(
+            system_name=name,
+            system_address=address,
+            star_pos=[rng.uniform(-4e4, 4e4) for _ in range(3)],
+            visited=True,
+            body_count=PLANETS_PER_SYSTEM,
+        )
+        for body_id in range(1, PLANETS_PER_SYSTEM + 1):
+            planet = Planet(
+                system_name=name,
+                SystemAddress=address,
+                BodyName=f"{name} {body_id} a",
+                BodyID=body_id,
+                planet_class=rng.choice([ROCKY, ICY, HMCB, ROCKY_ICE, WATER_WORLD]),
+                was_discovered=rng.random() < 0.5,
+                atmosphere=rng.choice(["None", "Ammonia", "CarbonDioxide", "Helium"]),
+                surface_gravity=rng.uniform(0.2, 20),
+                mass_em=rng.uniform(0.001, 5),
+            )
+            if rng.random() < 0.33:
+                planet.signal_count = rng.randint(1, 3)
+                planet.make_possible_bio_signals()
+            system.planets[body_id] = planet
+        yield system
+
+
+def held_bytes(build: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main() -> None:
+    planets = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    planets -= planets % PLANETS_PER_SYSTEM
+    get_species_index()
+
+    def build_models() -> list[System]:
+        return list(synthetic_systems(planets))
+
+    def build_compact() -> list[CompactSystem]:
+        return [compact_system(x) for x in synthetic_systems(planets)]
+
+    models = held_bytes(build_models)
+    compact = held_bytes(build_compact)
+    print(f"{planets:,} planets")
+    print(f"pydantic: {models / planets:7.0f} B/planet")
+    print(f" compact: {compact / planets:7.0f} B/planet ({models / compact:.1f}x less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Slotted records for systems that aren't being worked on. Repeated strings (system name,
+planet class, atmosphere, star class) are interned, body names drop the system name,
+and bio signals are an id for the species name packed with their found flags.
+Converting to and from the pydantic models happens only at the edges.
+"""
+
+import sys
+from typing import Iterable, Iterator
+
+from db.galaxy import BioSignal, Planet, Star, System
+from signals.rules import get_species_index
+
+TERRAFORMABLE = 1
+WAS_DISCOVERED = 2
+WAS_MAPPED = 4
+DETAILED_SCAN_BY_PLAYER = 8
+MAPPED_BY_PLAYER = 16
+NAME_AFTER_SYSTEM = 32
+"""body_name holds only what follows the system name."""
+
+GENUS_FOUND = 1
+SPECIES_FOUND = 2
+SIGNAL_FLAG_BITS = 2
+
+SPECIES_IDS: dict[tuple[str, str | None], int] = {}
+SPECIES_NAMES: list[tuple[str, str | None]] = []
+"""
+(genus, species) for each id in packed signals. Ids are handed out on first use and
+never reused, so unlike positions in the species catalog they don't move when the
+catalog is rebuilt.
+"""
+
+
+def intern_optional(value: str | None) -> str | None:
+    return None if value is None else sys.intern(value)
+
+
+def shorten_name(body_name: str, system_name: str) -> tuple[str, int]:
+    if system_name != "" and body_name.startswith(system_name):
+        return body_name[len(system_name) :], NAME_AFTER_SYSTEM
+    return body_name, 0
+
+
+class CompactPlanet:
+    __slots__ = (
+        "body_id",
+        "body_name",
+        "system_name",
+        "planet_class",
+        "atmosphere",
+        "flags",
+        "signal_count",
+        "temperature",
+        "surface_gravity",
+        "mass_em",
+        "signals",
+        "leaderboard_values",
+    )
+
+    def __init__(
+        self,
+        body_id: int,
+        body_name: str,
+        system_name: str,
+        planet_class: str | None,
+        atmosphere: str | None,
+        flags: int,
+        signal_count: int,
+        temperature: float | None,
+        surface_gravity: float | None,
+        mass_em: float | None,
+        signals: tuple[int, ...],
+        leaderboard_values: tuple[float, int],
+    ) -> None:
+        self.body_id = body_id
+        self.body_name = body_name
+        self.system_name = system_name
+        self.planet_class = planet_class
+        self.atmosphere = atmosphere
+        self.flags = flags
+        self.signal_count = signal_count
+        self.temperature = temperature
+        self.surface_gravity = surface_gravity
+        self.mass_em = mass_em
+        self.signals = signals
+        self.leaderboard_values = leaderboard_values
+
+
+class CompactSystem:
+    __slots__ = (
+        "system_name",
+        "system_address",
+        "star_pos",
+        "visited",
+        "body_count",
+        "stars",
+        "planets",
+    )
+
+    def __init__(
+        self,
+        system_name: str,
+        system_address: int,
+        star_pos: tuple[float, ...],
+        visited: bool,
+        body_count: int,
+        stars: tuple[tuple[int, str, str, int, str], ...],
+        planets: tuple[CompactPlanet, ...],
+    ) -> None:
+        self.system_name = system_name
+        self.system_address = system_address
+        self.star_pos = star_pos
+        self.visited = visited
+        self.body_count = body_count
+        self.stars = stars
+        self.planets = planets
+
+
+def species_id(name: tuple[str, str | None]) -> int:
+    key = SPECIES_IDS.get(name)
+    if key is None:
+        key = SPECIES_IDS[name] = len(SPECIES_NAMES)
+        SPECIES_NAMES.append(name)
+    return key
+
+
+def compact_signals(signals: Iterable[BioSignal]) -> tuple[int, ...]:
+    return tuple(
+        species_id((x.species.genus, x.species.species)) << SIGNAL_FLAG_BITS
+        | (GENUS_FOUND if x.genus_found else 0)
+        | (SPECIES_FOUND if x.species_found else 0)
+        for x in signals
+    )
+
+
+def expand_signals(packed: tuple[int, ...]) -> tuple[BioSignal, ...]:
+    index = get_species_index()
+    signals = []
+    for x in packed:
+        position = index.positions.get(SPECIES_NAMES[x >> SIGNAL_FLAG_BITS])
+        if position is None:
+            # species catalog changed since this was saved
+            continue
+        signals.append(
+            BioSignal(
+                species=index.species[position],
+                genus_found=bool(x & GENUS_FOUND),
+                species_found=bool(x & SPECIES_FOUND),
+            )
+        )
+    return tuple(signals)
+
+
+def compact_planet(planet: Planet) -> CompactPlanet:
+    body_name, flags = shorten_name(planet.BodyName, planet.system_name)
+    flags |= (
+        (TERRAFORMABLE if planet.terraformable else 0)
+        | (WAS_DISCOVERED if planet.was_discovered else 0)
+        | (WAS_MAPPED if planet.was_mapped else 0)
+        | (DETAILED_SCAN_BY_PLAYER if planet.detailed_scan_by_player else 0)
+        | (MAPPED_BY_PLAYER if planet.mapped_by_player else 0)
+    )
+    return CompactPlanet(
+        body_id=planet.BodyID,
+        body_name=body_name,
+        system_name=sys.intern(planet.system_name),
+        planet_class=intern_optional(planet.planet_class),
+        atmosphere=intern_optional(planet.atmosphere),
+        flags=flags,
+        signal_count=planet.signal_count,
+        temperature=planet.temperature,
+        surface_gravity=planet.surface_gravity,
+        mass_em=planet.mass_em,
+        signals=compact_signals(planet.signals),
+        leaderboard_values=planet.leaderboard_values,
+    )
+
+
+def expand_planet(record: CompactPlanet, system: CompactSystem) -> Planet:
+    flags = record.flags
+    prefix = record.system_name if flags & NAME_AFTER_SYSTEM else ""
+    return Planet(
+        SystemAddress=system.system_address,
+        BodyID=record.body_id,
+        BodyName=prefix + record.body_name,
+        system_name=record.system_name,
+        planet_class=record.planet_class,
+        terraformable=bool(flags & TERRAFORMABLE),
+        was_discovered=bool(flags & WAS_DISCOVERED),
+        was_mapped=bool(flags & WAS_MAPPED),
+        signal_count=record.signal_count,
+        atmosphere=record.atmosphere,
+        temperature=record.temperature,
+        surface_gravity=record.surface_gravity,
+        mass_em=record.mass_em,
+        detailed_scan_by_player=bool(flags & DETAILED_SCAN_BY_PLAYER),
+        mapped_by_player=bool(flags & MAPPED_BY_PLAYER),
+        signals=expand_signals(record.signals),
+    )
+
+
+def compact_system(system: System) -> CompactSystem:
+    stars = []
+    for star in system.stars.values():
+        body_name, flags = shorten_name(star.BodyName, star.system_name)
+        stars.append(
+            (
+                star.BodyID,
+                body_name,
+                sys.intern(star.system_name),
+                flags,
+                sys.intern(star.star_class),
+            )
+        )
+    return CompactSystem(
+        system_name=sys.intern(system.system_name),
+        system_address=system.system_address,
+        star_pos=tuple(system.star_pos),
+        visited=system.visited,
+        body_count=system.body_count,
+        stars=tuple(stars),
+        planets=tuple(compact_planet(x) for x in system.planets.values()),
+    )
+
+
+def expand_system(record: CompactSystem) -> System:
+    system = System(
+        system_name=record.system_name,
+        system_address=record.system_address,
+        star_pos=list(record.star_pos),
+        visited=record.visited,
+        body_count=record.body_count,
+    )
+    for body_id, body_name, system_name, flags, star_class in record.stars:
+        prefix = system_name if flags & NAME_AFTER_SYSTEM else ""
+        system.stars[body_id] = Star(
+            SystemAddress=record.system_address,
+            BodyID=body_id,
+            BodyName=prefix + body_name,
+            system_name=system_name,
+            star_class=star_class,
+        )
+    for planet in record.planets:
+        system.planets[planet.body_id] = expand_planet(planet, record)
+    return system
+
+
+class CompactStore:
+    """In-memory SystemBackend holding every system as a CompactSystem."""
+
+    def __init__(self) -> None:
+        self.records: dict[int, CompactSystem] = {}
+        self.meta: dict[str, str] = {}
+
+    def close(self) -> None:
+        pass
+
+    def has_system(self, system_address: int) -> bool:
+        return system_address in self.records
+
+    def system_addresses(self) -> Iterator[int]:
+        return iter(sorted(self.records))
+
+    def positions(self) -> Iterator[tuple[int, float, float, float]]:
+        # the galaxy may read these over several Tk ticks, saving systems in between
+        for address, record in list(self.records.items()):
+            if address != -1 and len(record.star_pos) == 3:
+                x, y, z = record.star_pos
+                yield address, x, y, z
+
+    def explored_systems(self) -> Iterator[int]:
+        for address, record in self.records.items():
+            if address != -1 and record.visited:
+                if all(x.flags & MAPPED_BY_PLAYER for x in record.planets):
+                    yield address
+
+    def ranked_planets(self) -> Iterator[tuple[int, int, float, float]]:
+        for address, record in self.records.items():
+            for planet in record.planets:
+                mapped, bio = planet.leaderboard_values
+                if mapped > 0 or bio > 0:
+                    yield address, planet.body_id, mapped, bio
+
+    def system_count(self) -> int:
+        return len(self.records)
+
+    def load_system(self, system_address: int) -> System | None:
+        record = self.records.get(system_address)
+        return None if record is None else expand_system(record)
+
+    def save_systems(self, systems: Iterable[System]) -> None:
+        for system in systems:
+            self.records[system.system_address] = compact_system(system)
+
+    def delete_system(self, system_address: int) -> None:
+        self.records.pop(system_address, None)
+
+    def get_meta(self, key: str) -> str | None:
+        return self.meta.get(key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.meta[key] = value
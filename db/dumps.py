@@ -0,0 +1,367 @@
+"""
+Import of offline galaxy dumps, gzipped or not.
+
+Two layouts are understood, and can be mixed line by line:
+
+    system dumps  one system per line, with its coordinates and a list of bodies
+                  (Spansh galaxy dumps, EDSM systemsWithCoordinates)
+    body dumps    one body per line, pointing back at its system (EDSM bodies)
+
+Either may be wrapped as a JSON array: a `[` line, records ending in commas, a `]`
+line. Lines are read and decompressed as a stream and turned into Systems in worker
+processes, a batch at a time, so memory use doesn't depend on the size of the dump.
+Progress is written next to the dump after every batch, and a later import of the
+same file picks up from there.
+
+    python -m db.dumps galaxy.json.gz [--galaxy-db PATH] [--workers N]
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from db.galaxy import Galaxy, Planet, System
+from db.store import GalaxyStore, default_store_path, open_galaxy
+
+GZIP_MAGIC = b"\x1f\x8b"
+DUMP_BATCH_SIZE = 1_000
+DUMP_PROGRESS_VERSION = 1
+BIOLOGICAL_SIGNAL = "$SAA_SignalType_Biological;"
+
+# dump planet types that are spelled differently in the journal
+PLANET_CLASSES = {
+    "Metal-rich body": "Metal rich body",
+    "High metal content world": "High metal content body",
+    "Rocky Ice world": "Rocky ice body",
+    "Earth-like world": "Earthlike body",
+    "Class I gas giant": "Sudarsky class I gas giant",
+    "Class II gas giant": "Sudarsky class II gas giant",
+    "Class III gas giant": "Sudarsky class III gas giant",
+    "Class IV gas giant": "Sudarsky class IV gas giant",
+    "Class V gas giant": "Sudarsky class V gas giant",
+    "Gas giant with water-based life": "Gas giant with water based life",
+    "Gas giant with ammonia-based life": "Gas giant with ammonia based life",
+    "Helium-rich gas giant": "Helium rich gas giant",
+}
+ATMOSPHERE_PREFIXES = ("Thin ", "Thick ", "Hot ")
+NOT_TERRAFORMABLE = ("", "Not terraformable")
+
+
+def planet_class_from_dump(sub_type: str | None) -> str | None:
+    if sub_type is None:
+        return None
+    return PLANET_CLASSES.get(sub_type, sub_type)
+
+
+def atmosphere_from_dump(atmosphere: str | None) -> str | None:
+    """Dump atmospheres ("Thin Carbon dioxide-rich") as the journal has them."""
+    if atmosphere is None:
+        return None
+    if atmosphere == "No atmosphere":
+        return "None"
+    for prefix in ATMOSPHERE_PREFIXES:
+        atmosphere = atmosphere.removeprefix(prefix)
+    words = atmosphere.replace("-", " ").split()
+    return "".join(x[:1].upper() + x[1:] for x in words)
+
+
+def planet_from_dump(
+    body: dict[str, Any], system_address: int, system_name: str
+) -> Planet | None:
+    if body.get("type") != "Planet" or body.get("bodyId") is None:
+        return None
+    gravity = body.get("gravity")
+    signals = (body.get("signals") or {}).get("signals") or {}
+    planet = Planet(
+        SystemAddress=system_address,
+        BodyID=body["bodyId"],
+        BodyName=body.get("name", ""),
+        system_name=system_name,
+        planet_class=planet_class_from_dump(body.get("subType")),
+        terraformable=(body.get("terraformingState") or "") not in NOT_TERRAFORMABLE,
+        # someone had to scan it for it to be in a dump. Dumps don't say reliably
+        # whether anyone mapped it, assuming so keeps the estimate on the low side
+        was_discovered=True,
+        was_mapped=True,
+        signal_count=signals.get(BIOLOGICAL_SIGNAL, 0),
+        atmosphere=atmosphere_from_dump(body.get("atmosphereType")),
+        temperature=body.get("surfaceTemperature"),
+        # dumps have g, the journal has m/s², Planet.gravity divides by 10
+        surface_gravity=None if gravity is None else gravity * 10,
+        mass_em=body.get("earthMasses"),
+    )
+    if planet.signal_count > 0:
+        planet.make_possible_bio_signals()
+    return planet
+
+
+def system_from_dump(record: dict[str, Any]) -> System | None:
+    if "systemId64" in record:
+        # a body dump line, the system only has what the body says about it
+        system = System(
+            system_name=record.get("systemName", ""),
+            system_address=record["systemId64"],
+            star_pos=[],
+        )
+        bodies = [record]
+    elif "id64" in record:
+        coords = record.get("coords") or {}
+        system = System(
+            system_name=record.get("name", ""),
+            system_address=record["id64"],
+            star_pos=[coords[x] for x in "xyz"] if len(coords) > 0 else [],
+            body_count=record.get("bodyCount") or 0,
+        )
+        bodies = record.get("bodies") or []
+    else:
+        return None
+    for body in bodies:
+        planet = planet_from_dump(body, system.system_address, system.system_name)
+        if planet is not None:
+            system.planets[planet.BodyID] = planet
+    return system
+
+
+def parse_dump_lines(lines: list[bytes]) -> list[System]:
+    """Worker side of an import: raw lines to Systems, skipping what isn't one."""
+    systems = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            system = system_from_dump(record)
+            if system is not None:
+                systems.append(system)
+    return systems
+
+
+def open_dump(path: str) -> gzip.GzipFile | io.BufferedReader:
+    with open(path, "rb") as file:
+        gzipped = file.read(2) == GZIP_MAGIC
+    return gzip.open(path, "rb") if gzipped else open(path, "rb")
+
+
+def read_dump(
+    path: str, offset: int = 0, batch_size: int = DUMP_BATCH_SIZE
+) -> Iterator[tuple[int, list[bytes]]]:
+    """
+    Batches of record lines from `offset` (in decompressed bytes) onwards, each with the
+    offset just past its last line. Seeking into a gzip stream still decompresses
+    everything before it, but nothing before it is parsed again.
+    """
+    with open_dump(path) as file:
+        file.seek(offset)
+        batch: list[bytes] = []
+        for line in file:
+            offset += len(line)
+            line = line.strip()
+            if line.endswith(b","):
+                line = line[:-1]
+            if line in (b"", b"[", b"]"):
+                continue
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield offset, batch
+                batch = []
+        if len(batch) > 0:
+            yield offset, batch
+
+
+def merge_system(galaxy: Galaxy, imported: System) -> int:
+    """
+    Add what a dump knows about a system, keeping anything already in the galaxy, which
+    came from the player's own journals or an earlier import. Returns bodies added.
+    """
+    address = imported.system_address
+    system = galaxy.systems.get(address)
+    if system is None:
+        galaxy.systems[address] = system = imported
+        added = list(imported.planets.values())
+    else:
+        if len(system.star_pos) == 0 and len(imported.star_pos) > 0:
+            system.star_pos = imported.star_pos
+        if system.system_name == "":
+            system.system_name = imported.system_name
+        system.body_count = max(system.body_count, imported.body_count)
+        added = []
+        for body_id, planet in imported.planets.items():
+            if body_id not in system.planets:
+                system.planets[body_id] = planet
+                added.append(planet)
+    galaxy.index_system(system)
+    for planet in added:
+        galaxy.rank_planet(planet)
+    return len(added)
+
+
+def progress_path_for(path: str) -> str:
+    return f"{path}.progress"
+
+
+@dataclass
+class DumpProgress:
+    size: int
+    mtime_ns: int
+    offset: int
+    """Decompressed bytes consumed up to the end of the last imported batch."""
+    systems: int = 0
+    bodies: int = 0
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+def load_progress(path: str, stat: os.stat_result) -> DumpProgress:
+    """Where an earlier import of the dump at `path` stopped, if it's the same file."""
+    fresh = DumpProgress(size=stat.st_size, mtime_ns=stat.st_mtime_ns, offset=0)
+    try:
+        with open(progress_path_for(path)) as file:
+            version, fields = json.load(file)
+        progress = DumpProgress(**fields)
+    except (OSError, ValueError, TypeError):
+        return fresh
+    if version != DUMP_PROGRESS_VERSION or not progress.matches(stat):
+        return fresh
+    return progress
+
+
+def save_progress(path: str, progress: DumpProgress) -> None:
+    progress_path = progress_path_for(path)
+    temp_path = f"{progress_path}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump([DUMP_PROGRESS_VERSION, progress.__dict__], file)
+    os.replace(temp_path, progress_path)
+
+
+@dataclass
+class ImportReport:
+    systems: int
+    bodies: int
+    seconds: float
+
+    @property
+    def bodies_per_second(self) -> float:
+        return self.bodies / self.seconds if self.seconds > 0 else 0.0
+
+
+class SerialExecutor(Executor):
+    """Runs jobs as they're submitted, for one worker or when there's no process pool."""
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def import_dump(
+    galaxy: Galaxy,
+    path: str,
+    workers: int = 1,
+    batch_size: int = DUMP_BATCH_SIZE,
+    on_batch: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """
+    Stream the dump at `path` into `galaxy`, resuming where the last import of the same
+    file stopped. Batches are parsed by `workers` processes, at most two per worker in
+    flight, and merged in order. The galaxy is flushed before progress is recorded, so
+    with a stored galaxy an interrupted import loses at most the batches in flight.
+    Reports count only what this call imported.
+    """
+    progress = load_progress(path, os.stat(path))
+    started = time.perf_counter()
+    report = ImportReport(systems=0, bodies=0, seconds=0.0)
+
+    def run(executor: Executor) -> None:
+        pending: deque[tuple[int, Future]] = deque()
+
+        def merge_oldest() -> None:
+            offset, future = pending.popleft()
+            systems: list[System] = future.result()
+            bodies = sum(merge_system(galaxy, x) for x in systems)
+            galaxy.flush()
+            progress.offset = offset
+            progress.systems += len(systems)
+            progress.bodies += bodies
+            save_progress(path, progress)
+            report.systems += len(systems)
+            report.bodies += bodies
+            report.seconds = time.perf_counter() - started
+            if on_batch is not None:
+                on_batch(report)
+
+        for offset, lines in read_dump(path, progress.offset, batch_size):
+            pending.append((offset, executor.submit(parse_dump_lines, lines)))
+            if len(pending) >= 2 * workers:
+                merge_oldest()
+        while len(pending) > 0:
+            merge_oldest()
+
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                run(executor)
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            # no usable process pool on this platform, carry on serially
+            progress = load_progress(path, os.stat(path))
+            run(SerialExecutor())
+    else:
+        run(SerialExecutor())
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Import galaxy dumps into a galaxy db."
+    )
+    parser.add_argument("dumps", nargs="+", metavar="DUMP")
+    parser.add_argument(
+        "--galaxy-db",
+        metavar="PATH",
+        default=default_store_path(),
+        help="galaxy database to import into",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=DUMP_BATCH_SIZE)
+    args = parser.parse_args()
+
+    store = GalaxyStore(args.galaxy_db)
+    galaxy = open_galaxy(store)
+    last_line = [0.0]
+
+    def print_report(report: ImportReport) -> None:
+        if report.seconds - last_line[0] >= 5:
+            last_line[0] = report.seconds
+            print(
+                f"{report.systems:,} systems, {report.bodies:,} bodies,"
+                f" {report.bodies_per_second:,.0f} bodies/s"
+            )
+
+    try:
+        for path in args.dumps:
+            print(path)
+            report = import_dump(
+                galaxy, path, args.workers, args.batch_size, on_batch=print_report
+            )
+            print(
+                f"{report.systems:,} systems, {report.bodies:,} bodies"
+                f" in {report.seconds:.1f}s, {report.bodies_per_second:,.0f} bodies/s"
+            )
+    finally:
+        galaxy.flush()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,53 @@
-from typing import cast
-from pydantic import BaseModel
+import heapq
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Iterable,
+    Iterator,
+    Sequence,
+)
+from pydantic import BaseModel, Field, PrivateAttr
 
 from journal_reader.journal_models import (
+    DSSEvent,
     DSSSignalEvent,
     DiscoveryScanEvent,
     FSDJumpEvent,
     FSSSignalEvent,
     ScanEvent,
+    ScanOrganicEvent,
 )
-from signals.signals import Flora, species_list
+from db.leaderboard import IndexedHeap
+from db.spatial import SectorGrid
+from signals.rules import get_species_index
+from signals.signals import Flora
 from utils.values import BASE, MEDIAN_MASS, TERRAFORMABLE, PLANET_VALUES, VALUES_ELSE
 
+if TYPE_CHECKING:
+    from db.store import StoredSystems
+
+BodyKey = tuple[int, int]
+"""(system address, body id)"""
 
-def get_bio_signal_values_from_list(
-    sorted_list: list["BioSignal"], count: int
-) -> list["BioSignal"]:
-    signals_to_value: list[BioSignal] = []
-    i = 0
-    while i < len(sorted_list) and len(signals_to_value) < count:
-        genuses_found = set(x.species.genus for x in signals_to_value)
-        signal = sorted_list[i]
-        if signal.species.genus not in genuses_found:
-            signals_to_value.append(signal)
-        i += 1
-    return signals_to_value
+
+def genus_value_bounds(
+    signals: Sequence["BioSignal"],
+) -> dict[str, tuple[int, int]]:
+    """
+    Cheapest and most valuable candidate species of each genus. Once a DSS has found
+    genera on the body, only those are left.
+    """
+    found = any(x.genus_found for x in signals)
+    bounds: dict[str, tuple[int, int]] = {}
+    for signal in signals:
+        if found and not signal.genus_found:
+            continue
+        value = signal.species.value or 0
+        low, high = bounds.get(signal.species.genus, (value, value))
+        bounds[signal.species.genus] = (min(low, value), max(high, value))
+    return bounds
 
 
 class BodyBioValues(BaseModel):
@@ -67,10 +91,24 @@ class Star(Body):
 
 class BioSignal(BaseModel):
     species: Flora
-    genus_found: bool = False
+    # Planet.genus_bounds depends on it, a DSS replaces the signal instead
+    genus_found: bool = Field(default=False, frozen=True)
     species_found: bool = False
 
 
+VALUATION_FIELDS = frozenset(
+    [
+        "planet_class",
+        "terraformable",
+        "mass_em",
+        "was_discovered",
+        "was_mapped",
+        "mapped_by_player",
+    ]
+)
+"""Planet fields the cartographic values depend on."""
+
+
 class Planet(Body):
     planet_class: str | None = None
     terraformable: bool = False
@@ -86,35 +124,33 @@ class Planet(Body):
     detailed_scan_by_player: bool = False
     mapped_by_player: bool = False
 
-    signals: list[BioSignal] = []
+    # a tuple, so that every change to the signals is an assignment, which clears the
+    # cached genus bounds
+    signals: tuple[BioSignal, ...] = ()
+
+    # Memos below (values_actual, values_estimate, genus_bounds) are kept in the
+    # instance __dict__ next to the fields. Reading a PrivateAttr goes through
+    # pydantic's __getattr__ and costs about as much as recomputing the values, a dict
+    # lookup doesn't. Equality, dumps and validation only look at fields.
+
+    # for profiling the valuation cache, shared by all planets
+    valuation_hits: ClassVar[int] = 0
+    valuation_misses: ClassVar[int] = 0
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in VALUATION_FIELDS:
+            self.__dict__.pop("values_actual", None)
+            self.__dict__.pop("values_estimate", None)
+        elif name == "signals":
+            value = tuple(value)
+            self.__dict__.pop("genus_bounds", None)
+        super().__setattr__(name, value)
 
     def make_possible_bio_signals(self) -> None:
-        maybe_species_list = []
-
-        for sp in species_list:
-            if (
-                sp.atmosphere_requirement is None
-                or len(sp.atmosphere_requirement) == 0
-                or self.atmosphere not in sp.atmosphere_requirement
-            ):
-                continue
-            if sp.max_gravity is not None and self.gravity > sp.max_gravity:
-                continue
-            if (
-                sp.max_temperature_k is not None
-                and self.temperature is not None
-                and self.temperature > sp.max_temperature_k
-            ):
-                continue
-            if (
-                sp.min_temperature_k is not None
-                and self.temperature is not None
-                and self.temperature < sp.min_temperature_k
-            ):
-                continue
-
-            maybe_species_list.append(sp)
-        self.signals = [BioSignal(species=x) for x in maybe_species_list]
+        maybe_species_list = get_species_index().candidates(
+            self.atmosphere, self.gravity, self.temperature
+        )
+        self.signals = tuple(BioSignal(species=x) for x in maybe_species_list)
 
     def update_from_fss(self, event: ScanEvent) -> None:
         self.BodyName = event.BodyName
@@ -130,34 +166,103 @@ class Planet(Body):
 
     def update_signals_from_dss(self, event: DSSSignalEvent) -> None:
         genuses = [x.Genus_Localised for x in event.Genuses]
-        for signal in self.signals:
-            if signal.species.genus in genuses:
-                signal.genus_found = True
+        cached = self.__dict__.get("genus_bounds")
+        self.signals = tuple(
+            (
+                x.model_copy(update={"genus_found": True})
+                if x.species.genus in genuses
+                else x
+            )
+            for x in self.signals
+        )
+        found = set(x.species.genus for x in self.signals if x.genus_found)
+        if cached is not None and len(found) > 0:
+            self.__dict__["genus_bounds"] = {
+                genus: bounds for genus, bounds in cached.items() if genus in found
+            }
+
+    def update_signals_from_organic_scan(self, event: ScanOrganicEvent) -> None:
+        """
+        The third sample (Analyse) of a species completes its genus, which is then down
+        to that species.
+        """
+        if event.ScanType != "Analyse":
+            return
+        genus = event.Genus_Localised
+        name = event.Species_Localised.lower()
+        others = [x for x in self.signals if x.species.genus != genus]
+        sampled = [
+            x
+            for x in self.signals
+            if x.species.genus == genus
+            and f"{genus} {x.species.species}".lower() == name
+        ]
+        if len(sampled) == 0:
+            # not one of the candidates, look it up in the whole catalog
+            index = get_species_index()
+            position = index.positions.get(
+                (genus, name.removeprefix(genus.lower() + " "))
+            )
+            if position is not None:
+                # found by a DSS if there was one, or it would be left out of the bounds
+                found = any(x.genus_found for x in self.signals)
+                sampled = [
+                    BioSignal(species=index.species[position], genus_found=found)
+                ]
+            else:
+                # unknown species, the genus is still done
+                sampled = [x for x in self.signals if x.species.genus == genus]
+        # genus_found stays as the DSS left it, genus_value_bounds reads it as such
+        self.signals = tuple(
+            others + [x.model_copy(update={"species_found": True}) for x in sampled]
+        )
+
+    @property
+    def genus_bounds(self) -> dict[str, tuple[int, int]]:
+        bounds = self.__dict__.get("genus_bounds")
+        if bounds is None:
+            bounds = self.__dict__["genus_bounds"] = genus_value_bounds(self.signals)
+        return bounds
 
     @property
     def bio_signal_values(self) -> BodyBioValues:
         if self.signal_count < 1:
             return BodyBioValues(min=0, max=0, actual=0, bonuses=0)
-        min_sorted = sorted(self.signals, key=lambda x: str(x.species.value))
-        signals_to_value_min = get_bio_signal_values_from_list(
-            min_sorted, self.signal_count
-        )
-
-        max_sorted = sorted(
-            self.signals, key=lambda x: str(x.species.value), reverse=True
-        )
-        signals_to_value_max = get_bio_signal_values_from_list(
-            max_sorted, self.signal_count
-        )
-
-        values = BodyBioValues(
-            min=sum(cast(int, x.species.value) for x in signals_to_value_min),
-            max=sum(cast(int, x.species.value) for x in signals_to_value_max),
+        # one species per genus counts, so the bounds are the cheapest genera at their
+        # cheapest species and the most valuable genera at their best
+        bounds = self.genus_bounds.values()
+        return BodyBioValues(
+            min=sum(heapq.nsmallest(self.signal_count, (x for x, _ in bounds))),
+            max=sum(heapq.nlargest(self.signal_count, (x for _, x in bounds))),
             actual=0,
             bonuses=0,
         )
 
-        return values
+    @property
+    def bio_value_left(self) -> int:
+        """Most the genera that haven't been sampled yet could be worth."""
+        sampled = set(x.species.genus for x in self.signals if x.species_found)
+        count = self.signal_count - len(sampled)
+        if count < 1:
+            return 0
+        bounds = self.genus_bounds.items()
+        return sum(
+            heapq.nlargest(
+                count, (x for genus, (_, x) in bounds if genus not in sampled)
+            )
+        )
+
+    @property
+    def leaderboard_values(self) -> tuple[float, int]:
+        """
+        Estimated value if the player still has to map it, and bio value left. A 0 keeps
+        the planet off that leaderboard.
+        """
+        if self.mapped_by_player or self.planet_class is None:
+            mapped = 0.0
+        else:
+            mapped = self.cartographic_values_estimate.total_value
+        return mapped, self.bio_value_left
 
     @property
     def bio_signal_value_label(self) -> str:
@@ -211,11 +316,27 @@ class Planet(Body):
 
     @property
     def cartographic_values_actual(self) -> BodyCartographicValues:
-        return self._calc_values(self.mapped_by_player)
+        values = self.__dict__.get("values_actual")
+        if values is None:
+            Planet.valuation_misses += 1
+            values = self.__dict__["values_actual"] = self._calc_values(
+                self.mapped_by_player
+            )
+        else:
+            Planet.valuation_hits += 1
+        return values
 
     @property
     def cartographic_values_estimate(self) -> BodyCartographicValues:
-        return self._calc_values(mapped_by_player=True)
+        values = self.__dict__.get("values_estimate")
+        if values is None:
+            Planet.valuation_misses += 1
+            values = self.__dict__["values_estimate"] = self._calc_values(
+                mapped_by_player=True
+            )
+        else:
+            Planet.valuation_hits += 1
+        return values
 
     @property
     def mass(self) -> float:
@@ -236,6 +357,11 @@ class System(BaseModel):
     planets: dict[int, Planet] = {}
     body_count: int = 0
 
+    @property
+    def explored(self) -> bool:
+        """Visited, and every planet known in it mapped by the player."""
+        return self.visited and all(x.mapped_by_player for x in self.planets.values())
+
     def honk(self, event: DiscoveryScanEvent) -> None:
         self.body_count += event.Bodies
 
@@ -284,19 +410,240 @@ class Galaxy(BaseModel):
     }
     current_system_id: int = -1
 
+    _stored: "StoredSystems | None" = PrivateAttr(default=None)
+    _saved_system_id: int | None = PrivateAttr(default=None)
+    _index: SectorGrid = PrivateAttr(default_factory=SectorGrid)
+    _unindexed: Callable[[], Iterable[tuple[int, float, float, float]]] | None = (
+        PrivateAttr(default=None)
+    )
+    _indexing: Iterator[tuple[int, float, float, float]] | None = PrivateAttr(
+        default=None
+    )
+    # addresses of explored systems, for a stored galaxy read from the backend the
+    # first time they're needed
+    _explored: set[int] = PrivateAttr(default_factory=set)
+    _explored_source: Callable[[], Iterable[int]] | None = PrivateAttr(default=None)
+    # bodies still worth a visit, keyed by (system address, body id). A stored galaxy
+    # fills them from the backend when they're first asked for.
+    _unranked: Callable[[], Iterable[tuple[int, int, float, float]]] | None = (
+        PrivateAttr(default=None)
+    )
+    _best_mapped: IndexedHeap[BodyKey] = PrivateAttr(default_factory=IndexedHeap)
+    _best_bio: IndexedHeap[BodyKey] = PrivateAttr(default_factory=IndexedHeap)
+
+    def model_post_init(self, __context: Any) -> None:
+        # a stored galaxy fills the index from the database instead of loading systems
+        if isinstance(self.systems, dict):
+            for system in self.systems.values():
+                self.index_system(system)
+                for planet in system.planets.values():
+                    self.rank_planet(planet)
+
+    @property
+    def spatial_index(self) -> SectorGrid:
+        for _ in self.index_positions():
+            pass
+        return self._index
+
+    def index_positions(self, batch: int = 1_000) -> Iterator[None]:
+        """
+        Read a stored galaxy's positions into the spatial index, yielding after every
+        `batch` systems so that the work can be spread over several Tk ticks.
+        """
+        # stored galaxies hand over their positions lazily so opening one stays cheap.
+        # Until then the backend keeps them, what's only in the LRU is written first.
+        # Once reading has started, systems are indexed as they come.
+        if self._unindexed is not None:
+            if self._stored is not None:
+                self._stored.flush()
+            self._indexing = iter(self._unindexed())
+            self._unindexed = None
+        while self._indexing is not None:
+            for i, (address, x, y, z) in enumerate(self._indexing, start=1):
+                self._index.insert(address, (x, y, z))
+                if i == batch:
+                    break
+            else:
+                self._indexing = None
+                return
+            yield
+
+    @property
+    def explored(self) -> set[int]:
+        if self._explored_source is not None:
+            if self._stored is not None:
+                self._stored.flush()
+            self._explored.update(self._explored_source())
+            self._explored_source = None
+        return self._explored
+
+    def mark_explored(self, address: int, explored: bool) -> None:
+        if self._explored_source is not None:
+            # not read from the backend yet, which will have this by then
+            return
+        if explored:
+            self._explored.add(address)
+        else:
+            self._explored.discard(address)
+
+    def index_system(self, system: System) -> None:
+        if system.system_address == -1:
+            return
+        # systems only seen in body dumps don't have coordinates yet, and a stored
+        # galaxy's positions stay in the backend until the index is first used
+        if len(system.star_pos) == 3 and self._unindexed is None:
+            self._index.insert(system.system_address, system.star_pos)
+        self.mark_explored(system.system_address, system.explored)
+
     def jump_to_system(self, event: FSDJumpEvent) -> System:
         if event.SystemAddress in self.systems:
             system = self.systems[event.SystemAddress]
             system.visited = True
+            self.mark_explored(system.system_address, system.explored)
+            self.current_system_id = system.system_address
             return system
         system = System(
             **event.dump(),
             visited=True,
         )
         self.systems[system.system_address] = system
+        self.index_system(system)
         self.current_system_id = system.system_address
         return system
 
     @property
     def current_system(self) -> System:
         return self.systems[self.current_system_id]
+
+    def peek_system(self, system_address: int) -> System | None:
+        """A system to read from. Stored galaxies don't pull it through their LRU."""
+        if self._stored is not None:
+            return self._stored.peek(system_address)
+        return self.systems.get(system_address)
+
+    def planets(self, keys: Iterable[BodyKey]) -> list[Planet]:
+        """The planets behind (system address, body id) keys, skipping unknown ones."""
+        systems: dict[int, System | None] = {}
+        found = []
+        for address, body_id in keys:
+            if address not in systems:
+                systems[address] = self.peek_system(address)
+            system = systems[address]
+            planet = None if system is None else system.planets.get(body_id)
+            if planet is not None:
+                found.append(planet)
+        return found
+
+    def planet(self, key: BodyKey) -> Planet | None:
+        found = self.planets([key])
+        return found[0] if len(found) > 0 else None
+
+    def rank_planet(self, planet: Planet) -> None:
+        """Put a planet's current values on the leaderboards, or take it off them."""
+        if self._unranked is not None:
+            # not read from the backend yet, which will have this by then
+            return
+        key = (planet.SystemAddress, planet.BodyID)
+        for board, value in zip(
+            (self._best_mapped, self._best_bio), planet.leaderboard_values
+        ):
+            if value > 0:
+                board.set(key, value)
+            else:
+                board.remove(key)
+
+    def fill_leaderboards(self) -> None:
+        if self._unranked is not None:
+            if self._stored is not None:
+                self._stored.flush()
+            for address, body_id, mapped, bio in self._unranked():
+                if mapped > 0:
+                    self._best_mapped.set((address, body_id), mapped)
+                if bio > 0:
+                    self._best_bio.set((address, body_id), bio)
+            self._unranked = None
+
+    def add_planet_from_scan(self, event: ScanEvent) -> Planet:
+        system = self.current_system
+        planet = system.add_planet_from_scan(event)
+        self.rank_planet(planet)
+        self.mark_explored(system.system_address, system.explored)
+        return planet
+
+    def add_planet_from_signals(self, event: FSSSignalEvent) -> Planet:
+        system = self.current_system
+        planet = system.add_planet_from_signals(event)
+        self.rank_planet(planet)
+        self.mark_explored(system.system_address, system.explored)
+        return planet
+
+    def map_planet(self, event: DSSEvent) -> Planet | None:
+        system = self.current_system
+        planet = system.planets.get(event.BodyID, None)
+        if planet is not None:
+            planet.mapped_by_player = True
+            self.rank_planet(planet)
+            self.mark_explored(system.system_address, system.explored)
+        return planet
+
+    def update_signals_from_dss(self, event: DSSSignalEvent) -> Planet | None:
+        planet = self.current_system.planets.get(event.BodyID, None)
+        if planet is not None:
+            planet.update_signals_from_dss(event)
+            self.rank_planet(planet)
+        return planet
+
+    def sample_organic(self, event: ScanOrganicEvent) -> Planet | None:
+        planet = self.current_system.planets.get(event.Body, None)
+        if planet is not None:
+            planet.update_signals_from_organic_scan(event)
+            self.rank_planet(planet)
+        return planet
+
+    def best_mapped_targets(self, count: int) -> list[tuple[float, BodyKey]]:
+        """(estimated value, (system address, body id)) of the best unmapped bodies."""
+        self.fill_leaderboards()
+        return self._best_mapped.top(count)
+
+    def best_bio_targets(self, count: int) -> list[tuple[float, BodyKey]]:
+        """(max bio value left, (system address, body id)) of the best bio planets."""
+        self.fill_leaderboards()
+        return self._best_bio.top(count)
+
+    def systems_within(
+        self, radius: float, origin: Sequence[float] | None = None
+    ) -> list[tuple[float, int]]:
+        """(distance, address) of known systems within `radius` ly, nearest first."""
+        if origin is None:
+            origin = self.current_system.star_pos
+        return self.spatial_index.within(origin, radius)
+
+    def nearest_unexplored(
+        self, count: int, origin: Sequence[float] | None = None
+    ) -> list[tuple[float, int]]:
+        """
+        (distance, address) of the `count` closest systems that haven't been visited or
+        still have planets the player hasn't mapped.
+        """
+        if origin is None:
+            origin = self.current_system.star_pos
+        explored = self.explored
+
+        def unexplored(system_address: int) -> bool:
+            return (
+                system_address != self.current_system_id
+                and system_address not in explored
+            )
+
+        return self.spatial_index.nearest(origin, count, unexplored)
+
+    def flush(self) -> None:
+        """Persist systems changed since the last flush. No-op for in-memory galaxies."""
+        if self._stored is None:
+            return
+        self._stored.flush()
+        if self._saved_system_id != self.current_system_id:
+            self._stored.store.set_meta(
+                "current_system_id", str(self.current_system_id)
+            )
+            self._saved_system_id = self.current_system_id
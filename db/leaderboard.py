@@ -0,0 +1,105 @@
+import heapq
+from typing import Generic, Hashable, Iterator, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class IndexedHeap(Generic[K]):
+    """
+    Max-heap of bodies by value that also knows where each body sits, so a body's value
+    can be changed or removed in O(log n) instead of rebuilding the heap.
+    """
+
+    def __init__(self) -> None:
+        self.values: list[float] = []
+        self.keys: list[K] = []
+        self.positions: dict[K, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.positions
+
+    def get(self, key: K) -> float | None:
+        position = self.positions.get(key)
+        return None if position is None else self.values[position]
+
+    def set(self, key: K, value: float) -> None:
+        position = self.positions.get(key)
+        if position is None:
+            self.values.append(value)
+            self.keys.append(key)
+            self.positions[key] = len(self.keys) - 1
+            self.sift_up(len(self.keys) - 1)
+            return
+        previous = self.values[position]
+        self.values[position] = value
+        if value > previous:
+            self.sift_up(position)
+        elif value < previous:
+            self.sift_down(position)
+
+    def remove(self, key: K) -> None:
+        position = self.positions.pop(key, None)
+        if position is None:
+            return
+        last = len(self.keys) - 1
+        if position != last:
+            self.move(last, position)
+        self.values.pop()
+        self.keys.pop()
+        if position != last:
+            self.sift_up(position)
+            self.sift_down(position)
+
+    def move(self, source: int, target: int) -> None:
+        self.values[target] = self.values[source]
+        self.keys[target] = self.keys[source]
+        self.positions[self.keys[target]] = target
+
+    def swap(self, a: int, b: int) -> None:
+        self.values[a], self.values[b] = self.values[b], self.values[a]
+        self.keys[a], self.keys[b] = self.keys[b], self.keys[a]
+        self.positions[self.keys[a]] = a
+        self.positions[self.keys[b]] = b
+
+    def sift_up(self, position: int) -> None:
+        while position > 0:
+            parent = (position - 1) // 2
+            if self.values[parent] >= self.values[position]:
+                break
+            self.swap(parent, position)
+            position = parent
+
+    def sift_down(self, position: int) -> None:
+        size = len(self.keys)
+        while True:
+            largest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self.values[child] > self.values[largest]:
+                    largest = child
+            if largest == position:
+                return
+            self.swap(position, largest)
+            position = largest
+
+    def top(self, count: int) -> list[tuple[float, K]]:
+        """
+        The `count` most valuable entries, best first. Walks the heap from the root
+        through a frontier of candidates, so this is O(count log count) at any size.
+        """
+        return list(self.iter_top(count))
+
+    def iter_top(self, count: int) -> Iterator[tuple[float, K]]:
+        if len(self.keys) == 0:
+            return
+        # heapq is a min-heap, so the frontier holds negated values
+        frontier = [(-self.values[0], 0)]
+        while len(frontier) > 0 and count > 0:
+            value, position = heapq.heappop(frontier)
+            yield -value, self.keys[position]
+            count -= 1
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(self.keys):
+                    heapq.heappush(frontier, (-self.values[child], child))
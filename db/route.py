@@ -0,0 +1,134 @@
+import heapq
+from typing import Iterator, NamedTuple
+
+from db.galaxy import Galaxy, System
+
+
+class Route(NamedTuple):
+    systems: list[int]
+    """Addresses of the systems to jump to, in order, not including the start."""
+    value: float
+    """Expected unmapped value collected along the way."""
+    distance: float
+
+    @property
+    def value_per_jump(self) -> float:
+        """For ranking, total value alone favours the longest routes."""
+        return self.value / len(self.systems)
+
+
+def system_value(system: System) -> float:
+    """
+    What's still to be earned in a system: estimated mapped value of the planets the
+    player hasn't mapped, plus the most their unsampled genera could be worth.
+    """
+    value = 0.0
+    for planet in system.planets.values():
+        if not planet.mapped_by_player:
+            value += planet.cartographic_values_estimate.total_value
+        value += planet.bio_value_left
+    return value
+
+
+class RoutePlanner:
+    """
+    Dijkstra over known systems, neighbours being the systems within jump range. A jump
+    costs between 0 and 1 depending on how much value waits at the other end, so the
+    cheapest paths are the ones that pass through valuable systems. Routes come out as
+    their destinations are settled, cheapest first, so they can be shown as they arrive.
+    """
+
+    def __init__(
+        self,
+        galaxy: Galaxy,
+        jump_range: float,
+        max_jumps: int = 20,
+        max_systems: int = 5_000,
+        value_scale: float = 100_000,
+    ) -> None:
+        self.galaxy = galaxy
+        self.jump_range = jump_range
+        self.max_jumps = max_jumps
+        self.max_systems = max_systems
+        self.value_scale = value_scale
+        self.values: dict[int, float] = {}
+
+    def value(self, system_address: int) -> float:
+        value = self.values.get(system_address)
+        if value is None:
+            # only read, peeking keeps a search over thousands of systems from churning
+            # a stored galaxy's LRU and writing them all back
+            system = self.galaxy.peek_system(system_address)
+            value = 0.0 if system is None else system_value(system)
+            self.values[system_address] = value
+        return value
+
+    def jump_cost(self, system_address: int) -> float:
+        return 1 / (1 + self.value(system_address) / self.value_scale)
+
+    def plan(self, origin: int | None = None) -> Iterator[Route]:
+        """
+        Routes from `origin` (the current system by default) to every reachable system
+        with something left to earn, until `max_systems` systems have been settled.
+        """
+        return (x for x in self.steps(origin) if x is not None)
+
+    def steps(self, origin: int | None = None) -> Iterator[Route | None]:
+        """
+        `plan`, but also yielding None after each system settled with nothing in it, and
+        while a stored galaxy's spatial index is still being read.
+        """
+        yield from self.galaxy.index_positions()
+        if origin is None:
+            origin = self.galaxy.current_system_id
+        index = self.galaxy.spatial_index
+        if origin not in index:
+            return
+
+        # cost, address; the rest of each entry lives in the dicts below
+        queue: list[tuple[float, int]] = [(0.0, origin)]
+        costs = {origin: 0.0}
+        parents: dict[int, int] = {}
+        jumps = {origin: 0}
+        distances = {origin: 0.0}
+        collected = {origin: 0.0}
+        settled: set[int] = set()
+
+        while len(queue) > 0 and len(settled) < self.max_systems:
+            cost, address = heapq.heappop(queue)
+            if address in settled:
+                continue
+            settled.add(address)
+
+            if address != origin and self.value(address) > 0:
+                yield Route(
+                    systems=self.path(parents, origin, address),
+                    value=collected[address],
+                    distance=distances[address],
+                )
+            else:
+                yield None
+            if jumps[address] >= self.max_jumps:
+                continue
+
+            position = index.positions[address]
+            for distance, neighbour in index.within(position, self.jump_range):
+                if neighbour in settled:
+                    continue
+                next_cost = cost + self.jump_cost(neighbour)
+                if next_cost < costs.get(neighbour, float("inf")):
+                    costs[neighbour] = next_cost
+                    parents[neighbour] = address
+                    jumps[neighbour] = jumps[address] + 1
+                    distances[neighbour] = distances[address] + distance
+                    collected[neighbour] = collected[address] + self.value(neighbour)
+                    heapq.heappush(queue, (next_cost, neighbour))
+
+    @staticmethod
+    def path(parents: dict[int, int], origin: int, address: int) -> list[int]:
+        path = [address]
+        while path[-1] != origin:
+            path.append(parents[path[-1]])
+        path.pop()
+        path.reverse()
+        return path
@@ -0,0 +1,287 @@
+"""
+Binary Galaxy snapshots.
+
+    header    magic, format version, system count, length of the meta JSON, offset of
+              the index, number of leaderboard entries
+    meta      JSON object (current system and anything else set through set_meta)
+    records   per system, a u32 length followed by the System as JSON
+    index     system addresses (sorted), record offsets, x/y/z star positions and
+              whether each system is explored, each as one little-endian array of
+              `count` entries
+    boards    system address, body id and `Planet.leaderboard_values` of the planets
+              on a leaderboard, as little-endian arrays
+
+The index comes last so that records can be written as they come, and only the index
+and boards are held in memory while writing. Opening a snapshot reads the header and
+copies the index and board arrays, nothing else. A record is parsed the first time its
+system is looked up.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Callable, Iterable, Iterator
+
+from db.galaxy import Galaxy, System
+from db.store import StoredSystems, open_galaxy
+
+MAGIC = b"EXPLOSNP"
+SNAPSHOT_FORMAT_VERSION = 4
+HEADER = struct.Struct("<8sIQIQQ")
+LENGTH = struct.Struct("<I")
+INDEX_ARRAYS = (
+    ("addresses", "q"),
+    ("offsets", "Q"),
+    ("x", "d"),
+    ("y", "d"),
+    ("z", "d"),
+    ("explored", "B"),
+)
+BOARD_ARRAYS = (
+    ("system_address", "q"),
+    ("body_id", "q"),
+    ("mapped", "d"),
+    ("bio", "d"),
+)
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(
+    path: str,
+    systems: Iterable[System],
+    meta: dict[str, str],
+    replace: Callable[[str, str], None] = os.replace,
+) -> int:
+    """
+    Write `systems`, in address order, to `path` atomically, returning how many were
+    written. The file is written next to `path` and moved over it with `replace`.
+    """
+    meta_json = json.dumps(meta).encode()
+    index: dict[str, array] = {name: array(typecode) for name, typecode in INDEX_ARRAYS}
+    boards: dict[str, array] = {
+        name: array(typecode) for name, typecode in BOARD_ARRAYS
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        # the header is written again once the counts and index offset are known
+        file.write(HEADER.pack(MAGIC, SNAPSHOT_FORMAT_VERSION, 0, len(meta_json), 0, 0))
+        file.write(meta_json)
+        offset = HEADER.size + len(meta_json)
+        for system in systems:
+            addresses = index["addresses"]
+            if len(addresses) > 0 and system.system_address <= addresses[-1]:
+                raise SnapshotError("systems aren't in address order")
+            record = system.model_dump_json().encode()
+            # NaN for systems without coordinates, which positions leaves out
+            x, y, z = system.star_pos if len(system.star_pos) == 3 else (math.nan,) * 3
+            addresses.append(system.system_address)
+            index["offsets"].append(offset)
+            index["x"].append(x)
+            index["y"].append(y)
+            index["z"].append(z)
+            index["explored"].append(int(system.explored))
+            for planet in system.planets.values():
+                mapped, bio = planet.leaderboard_values
+                if mapped > 0 or bio > 0:
+                    boards["system_address"].append(system.system_address)
+                    boards["body_id"].append(planet.BodyID)
+                    boards["mapped"].append(mapped)
+                    boards["bio"].append(bio)
+            file.write(LENGTH.pack(len(record)))
+            file.write(record)
+            offset += LENGTH.size + len(record)
+        for name, _ in INDEX_ARRAYS:
+            file.write(little_endian(index[name]))
+        for name, _ in BOARD_ARRAYS:
+            file.write(little_endian(boards[name]))
+        count = len(index["addresses"])
+        ranked = len(boards["system_address"])
+        file.seek(0)
+        file.write(
+            HEADER.pack(
+                MAGIC, SNAPSHOT_FORMAT_VERSION, count, len(meta_json), offset, ranked
+            )
+        )
+    replace(temp_path, path)
+    return count
+
+
+class SnapshotStore:
+    """
+    Read side of a snapshot, usable as the SystemBackend of StoredSystems. Systems saved
+    or deleted after opening are kept in memory until the next `write_snapshot`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.open()
+
+    def open(self) -> None:
+        path = self.path
+        self.changed: dict[int, bytes] = {}
+        self.deleted: set[int] = set()
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            raise SnapshotError(f"{path} is too short to be a snapshot")
+        magic, version, count, meta_length, position, ranked = HEADER.unpack_from(
+            self.map, 0
+        )
+        if magic != MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotError(
+                f"{path} isn't a version {SNAPSHOT_FORMAT_VERSION} snapshot"
+            )
+        self.meta: dict[str, str] = json.loads(
+            self.map[HEADER.size : HEADER.size + meta_length]
+        )
+        self.index: dict[str, array] = {}
+        self.boards: dict[str, array] = {}
+        for arrays, length, target in (
+            (INDEX_ARRAYS, count, self.index),
+            (BOARD_ARRAYS, ranked, self.boards),
+        ):
+            for name, typecode in arrays:
+                values = array(typecode)
+                size = length * values.itemsize
+                values.frombytes(self.map[position : position + size])
+                if sys.byteorder == "big":
+                    values.byteswap()
+                target[name] = values
+                position += size
+        self.addresses = self.index["addresses"]
+
+    def close(self) -> None:
+        self.map.close()
+
+    def replace(self, temp_path: str, path: str) -> None:
+        """
+        Move a new snapshot over this one's file and reopen it. The map is closed first,
+        Windows won't replace a file that's mapped.
+        """
+        self.close()
+        os.replace(temp_path, path)
+        self.open()
+
+    def find(self, system_address: int) -> int | None:
+        i = bisect_left(self.addresses, system_address)
+        if i < len(self.addresses) and self.addresses[i] == system_address:
+            return i
+        return None
+
+    def has_system(self, system_address: int) -> bool:
+        if system_address in self.changed:
+            return True
+        if system_address in self.deleted:
+            return False
+        return self.find(system_address) is not None
+
+    def system_addresses(self) -> Iterator[int]:
+        stored = (x for x in self.addresses if x not in self.deleted)
+        return iter(sorted(set(stored) | set(self.changed)))
+
+    def positions(self) -> Iterator[tuple[int, float, float, float]]:
+        x, y, z = self.index["x"], self.index["y"], self.index["z"]
+        for i, address in enumerate(self.addresses):
+            if address != -1 and address not in self.deleted:
+                if address not in self.changed and not math.isnan(x[i]):
+                    yield address, x[i], y[i], z[i]
+        # the galaxy may read these over several Tk ticks, saving systems in between
+        for address, record in list(self.changed.items()):
+            star_pos = System.model_validate_json(record).star_pos
+            if address != -1 and len(star_pos) == 3:
+                yield address, star_pos[0], star_pos[1], star_pos[2]
+
+    def explored_systems(self) -> Iterator[int]:
+        explored = self.index["explored"]
+        for i, address in enumerate(self.addresses):
+            if explored[i] and address != -1 and address not in self.deleted:
+                if address not in self.changed:
+                    yield address
+        for address, record in self.changed.items():
+            if address != -1 and System.model_validate_json(record).explored:
+                yield address
+
+    def ranked_planets(self) -> Iterator[tuple[int, int, float, float]]:
+        for address, body_id, mapped, bio in zip(
+            *(self.boards[name] for name, _ in BOARD_ARRAYS)
+        ):
+            if address not in self.deleted and address not in self.changed:
+                yield address, body_id, mapped, bio
+        for address, record in self.changed.items():
+            for planet in System.model_validate_json(record).planets.values():
+                mapped, bio = planet.leaderboard_values
+                if mapped > 0 or bio > 0:
+                    yield address, planet.BodyID, mapped, bio
+
+    def system_count(self) -> int:
+        return sum(1 for _ in self.system_addresses())
+
+    def load_system(self, system_address: int) -> System | None:
+        record = self.changed.get(system_address)
+        if record is not None:
+            return System.model_validate_json(record)
+        if system_address in self.deleted:
+            return None
+        i = self.find(system_address)
+        if i is None:
+            return None
+        offset = self.index["offsets"][i]
+        (length,) = LENGTH.unpack_from(self.map, offset)
+        start = offset + LENGTH.size
+        return System.model_validate_json(self.map[start : start + length])
+
+    def save_systems(self, systems: Iterable[System]) -> None:
+        for system in systems:
+            self.changed[system.system_address] = system.model_dump_json().encode()
+            self.deleted.discard(system.system_address)
+
+    def delete_system(self, system_address: int) -> None:
+        self.changed.pop(system_address, None)
+        self.deleted.add(system_address)
+
+    def get_meta(self, key: str) -> str | None:
+        return self.meta.get(key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.meta[key] = value
+
+
+def save_snapshot(galaxy: Galaxy, path: str) -> int:
+    """Write every system of `galaxy` to `path`, returning how many were written."""
+    galaxy.flush()
+    meta = {"current_system_id": str(galaxy.current_system_id)}
+    replace: Callable[[str, str], None] = os.replace
+    if isinstance(galaxy.systems, StoredSystems):
+        store = galaxy.systems.store
+        if isinstance(store, SnapshotStore):
+            meta = {**store.meta, **meta}
+            if os.path.exists(path) and os.path.samefile(store.path, path):
+                replace = store.replace
+        # everything is in the backend after the flush, read it one system at a time
+        # instead of pulling all of it through the LRU
+        loaded = (store.load_system(x) for x in store.system_addresses())
+        systems: Iterable[System] = (x for x in loaded if x is not None)
+    else:
+        systems = (galaxy.systems[x] for x in sorted(galaxy.systems))
+    return write_snapshot(path, systems, meta, replace)
+
+
+def load_snapshot(path: str, capacity: int = 256) -> Galaxy:
+    """Open a snapshot as a Galaxy. Systems are parsed when first looked up."""
+    return open_galaxy(SnapshotStore(path), capacity)
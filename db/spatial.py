@@ -0,0 +1,190 @@
+import heapq
+import math
+from itertools import product
+from typing import Callable, Iterator, Sequence
+
+Cell = tuple[int, int, int]
+
+
+class SectorGrid:
+    """
+    Uniform grid over system coordinates, in light years. Each cell holds the addresses
+    of the systems inside it, so proximity queries only look at nearby cells instead of
+    every known system.
+    """
+
+    def __init__(self, cell_size: float = 100.0) -> None:
+        self.cell_size = cell_size
+        self.cells: dict[Cell, list[int]] = {}
+        self.positions: dict[int, tuple[float, float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, system_address: object) -> bool:
+        return system_address in self.positions
+
+    def cell_of(self, position: Sequence[float]) -> Cell:
+        size = self.cell_size
+        return (
+            math.floor(position[0] / size),
+            math.floor(position[1] / size),
+            math.floor(position[2] / size),
+        )
+
+    def insert(self, system_address: int, position: Sequence[float]) -> None:
+        point = (float(position[0]), float(position[1]), float(position[2]))
+        previous = self.positions.get(system_address)
+        if previous == point:
+            return
+        if previous is not None:
+            self.remove(system_address)
+        self.positions[system_address] = point
+        self.cells.setdefault(self.cell_of(point), []).append(system_address)
+
+    def remove(self, system_address: int) -> None:
+        point = self.positions.pop(system_address, None)
+        if point is None:
+            return
+        cell = self.cell_of(point)
+        members = self.cells[cell]
+        members.remove(system_address)
+        if len(members) == 0:
+            del self.cells[cell]
+
+    def distance(self, system_address: int, origin: Sequence[float]) -> float:
+        x, y, z = self.positions[system_address]
+        return math.sqrt(
+            (x - origin[0]) ** 2 + (y - origin[1]) ** 2 + (z - origin[2]) ** 2
+        )
+
+    def cell_distance(self, cell: Cell, origin: Sequence[float]) -> float:
+        """Shortest distance from `origin` to any point of `cell`."""
+        total = 0.0
+        for index, value in zip(cell, origin):
+            low = index * self.cell_size
+            high = low + self.cell_size
+            if value < low:
+                total += (low - value) ** 2
+            elif value > high:
+                total += (value - high) ** 2
+        return math.sqrt(total)
+
+    def ring(self, center: Cell, radius: int) -> Iterator[Cell]:
+        """Cells on the surface of the cube `radius` cells away from `center`."""
+        cx, cy, cz = center
+        if radius == 0:
+            yield center
+            return
+        span = range(-radius, radius + 1)
+        for dx, dy in product(span, span):
+            if abs(dx) == radius or abs(dy) == radius:
+                for dz in span:
+                    yield (cx + dx, cy + dy, cz + dz)
+            else:
+                yield (cx + dx, cy + dy, cz - radius)
+                yield (cx + dx, cy + dy, cz + radius)
+
+    def within(self, origin: Sequence[float], radius: float) -> list[tuple[float, int]]:
+        """(distance, address) of every system within `radius` ly, nearest first."""
+        center = self.cell_of(origin)
+        reach = math.ceil(radius / self.cell_size)
+        if (2 * reach + 1) ** 3 > len(self.cells):
+            cells: Iterator[Cell] | list[Cell] = list(self.cells)
+        else:
+            span = range(-reach, reach + 1)
+            cells = (
+                (center[0] + dx, center[1] + dy, center[2] + dz)
+                for dx, dy, dz in product(span, span, span)
+            )
+
+        found: list[tuple[float, int]] = []
+        positions = self.positions
+        ox, oy, oz = origin[0], origin[1], origin[2]
+        limit = radius * radius
+        for cell in cells:
+            members = self.cells.get(cell)
+            if members is None or self.cell_distance(cell, origin) > radius:
+                continue
+            # hot loop for the route planner, compare squared distances inline
+            for address in members:
+                x, y, z = positions[address]
+                squared = (x - ox) ** 2 + (y - oy) ** 2 + (z - oz) ** 2
+                if squared <= limit:
+                    found.append((math.sqrt(squared), address))
+        found.sort()
+        return found
+
+    def nearest(
+        self,
+        origin: Sequence[float],
+        count: int,
+        accept: Callable[[int], bool] | None = None,
+    ) -> list[tuple[float, int]]:
+        """
+        (distance, address) of the `count` systems closest to `origin` that `accept`
+        allows, nearest first. Walks outwards one shell of cells at a time and stops once
+        no unvisited cell can hold anything closer than what was already found.
+        """
+        if count <= 0 or len(self.cells) == 0:
+            return []
+        # max-heap of the best candidates so far, as (-squared distance, address)
+        best: list[tuple[float, int]] = []
+        positions = self.positions
+        ox, oy, oz = origin[0], origin[1], origin[2]
+
+        def bound() -> float:
+            """Squared distance a system has to beat to make the list."""
+            return -best[0][0] if len(best) == count else math.inf
+
+        def consider(cell: Cell) -> None:
+            # hot loop for nearest_unexplored, compare squared distances inline
+            for address in self.cells[cell]:
+                x, y, z = positions[address]
+                squared = (x - ox) ** 2 + (y - oy) ** 2 + (z - oz) ** 2
+                full = len(best) == count
+                if full and squared >= -best[0][0]:
+                    continue
+                if accept is not None and not accept(address):
+                    continue
+                if full:
+                    heapq.heapreplace(best, (-squared, address))
+                else:
+                    heapq.heappush(best, (-squared, address))
+
+        size = self.cell_size
+        center = self.cell_of(origin)
+        # nothing `radius` rings out is closer than the nearest face of the origin's own
+        # cell plus `radius - 1` whole cells
+        margin = min(
+            min(value - index * size, (index + 1) * size - value)
+            for index, value in zip(center, origin)
+        )
+        visited_cells = 0
+        radius = 0
+        while visited_cells < len(self.cells):
+            if radius > 0 and (margin + (radius - 1) * size) ** 2 >= bound():
+                break
+            shell_size = (
+                1 if radius == 0 else (2 * radius + 1) ** 3 - (2 * radius - 1) ** 3
+            )
+            if shell_size > len(self.cells):
+                # sparse grid, cheaper to go through the occupied cells by distance
+                remaining = sorted(
+                    (self.cell_distance(cell, origin), cell)
+                    for cell in self.cells
+                    if max(abs(a - b) for a, b in zip(cell, center)) >= radius
+                )
+                for cell_distance, cell in remaining:
+                    if cell_distance**2 >= bound():
+                        break
+                    consider(cell)
+                break
+            for cell in self.ring(center, radius):
+                if cell in self.cells:
+                    visited_cells += 1
+                    if self.cell_distance(cell, origin) ** 2 < bound():
+                        consider(cell)
+            radius += 1
+
+        return sorted((math.sqrt(-squared), address) for squared, address in best)
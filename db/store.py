@@ -0,0 +1,381 @@
+import hashlib
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Iterator, MutableMapping, Protocol
+
+from db.galaxy import BioSignal, Galaxy, Planet, Star, System
+from signals.signals import species_list
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS systems (
+    system_address INTEGER PRIMARY KEY,
+    system_name TEXT NOT NULL,
+    x REAL,
+    y REAL,
+    z REAL,
+    visited INTEGER NOT NULL,
+    body_count INTEGER NOT NULL,
+    stars TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS planets (
+    system_address INTEGER NOT NULL,
+    body_id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    mapped_value REAL NOT NULL,
+    bio_value REAL NOT NULL,
+    PRIMARY KEY (system_address, body_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS bio_signals (
+    system_address INTEGER NOT NULL,
+    body_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    genus TEXT NOT NULL,
+    species TEXT,
+    genus_found INTEGER NOT NULL,
+    species_found INTEGER NOT NULL,
+    PRIMARY KEY (system_address, body_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SystemBackend(Protocol):
+    """Where StoredSystems keeps the systems that aren't in its LRU."""
+
+    def close(self) -> None: ...
+
+    def has_system(self, system_address: int) -> bool: ...
+
+    def system_addresses(self) -> Iterator[int]: ...
+
+    def positions(self) -> Iterator[tuple[int, float, float, float]]: ...
+
+    def explored_systems(self) -> Iterator[int]: ...
+
+    def ranked_planets(self) -> Iterator[tuple[int, int, float, float]]: ...
+
+    def system_count(self) -> int: ...
+
+    def load_system(self, system_address: int) -> System | None: ...
+
+    def save_systems(self, systems: Iterable[System]) -> None: ...
+
+    def delete_system(self, system_address: int) -> None: ...
+
+    def get_meta(self, key: str) -> str | None: ...
+
+    def set_meta(self, key: str, value: str) -> None: ...
+
+
+def default_store_path() -> str:
+    return os.path.join(str(Path.home()), ".explo-helper", "galaxy.sqlite3")
+
+
+class GalaxyStore:
+    """sqlite3 persistence for systems, their planets and the planets' bio signals."""
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or default_store_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+        self.species_by_name = {(x.genus, x.species): x for x in species_list}
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def has_system(self, system_address: int) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM systems WHERE system_address = ?", (system_address,)
+        ).fetchone()
+        return row is not None
+
+    def system_addresses(self) -> Iterator[int]:
+        for (address,) in self.connection.execute(
+            "SELECT system_address FROM systems ORDER BY system_address"
+        ):
+            yield address
+
+    def positions(self) -> Iterator[tuple[int, float, float, float]]:
+        yield from self.connection.execute(
+            "SELECT system_address, x, y, z FROM systems "
+            "WHERE system_address != -1 AND x IS NOT NULL"
+        )
+
+    def explored_systems(self) -> Iterator[int]:
+        """Visited systems without a planet the player hasn't mapped."""
+        for (address,) in self.connection.execute(
+            "SELECT system_address FROM systems AS s "
+            "WHERE visited AND system_address != -1 AND NOT EXISTS ("
+            "    SELECT 1 FROM planets AS p WHERE p.system_address = s.system_address"
+            "    AND NOT json_extract(p.data, '$.mapped_by_player')"
+            ")"
+        ):
+            yield address
+
+    def ranked_planets(self) -> Iterator[tuple[int, int, float, float]]:
+        """Address, body id and `Planet.leaderboard_values` of planets on a leaderboard."""
+        yield from self.connection.execute(
+            "SELECT system_address, body_id, mapped_value, bio_value FROM planets "
+            "WHERE mapped_value > 0 OR bio_value > 0"
+        )
+
+    def system_count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM systems").fetchone()[0]
+
+    def load_system(self, system_address: int) -> System | None:
+        row = self.connection.execute(
+            "SELECT system_name, x, y, z, visited, body_count, stars FROM systems "
+            "WHERE system_address = ?",
+            (system_address,),
+        ).fetchone()
+        if row is None:
+            return None
+        name, x, y, z, visited, body_count, stars = row
+        system = System(
+            system_name=name,
+            system_address=system_address,
+            star_pos=[] if x is None else [x, y, z],
+            visited=bool(visited),
+            body_count=body_count,
+            stars={int(k): Star(**v) for k, v in json.loads(stars).items()},
+        )
+
+        signals: dict[int, list[BioSignal]] = {}
+        for (
+            body_id,
+            genus,
+            species,
+            genus_found,
+            species_found,
+        ) in self.connection.execute(
+            "SELECT body_id, genus, species, genus_found, species_found "
+            "FROM bio_signals WHERE system_address = ? ORDER BY body_id, position",
+            (system_address,),
+        ):
+            flora = self.species_by_name.get((genus, species))
+            if flora is None:
+                # species catalog changed since this was saved
+                continue
+            signals.setdefault(body_id, []).append(
+                BioSignal(
+                    species=flora,
+                    genus_found=bool(genus_found),
+                    species_found=bool(species_found),
+                )
+            )
+
+        for body_id, data in self.connection.execute(
+            "SELECT body_id, data FROM planets WHERE system_address = ?",
+            (system_address,),
+        ):
+            planet = Planet.model_validate_json(data)
+            planet.signals = tuple(signals.get(body_id, []))
+            system.planets[body_id] = planet
+        return system
+
+    def save_systems(self, systems: Iterable[System]) -> None:
+        """Write a batch of systems in one transaction, replacing what was stored."""
+        with self.connection:
+            for system in systems:
+                self.write_system(system)
+
+    def write_system(self, system: System) -> None:
+        address = system.system_address
+        # NULL until something with coordinates, a body dump doesn't have them
+        x, y, z = system.star_pos if len(system.star_pos) == 3 else (None,) * 3
+        stars = {k: v.model_dump() for k, v in system.stars.items()}
+        self.connection.execute(
+            "INSERT OR REPLACE INTO systems VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                address,
+                system.system_name,
+                x,
+                y,
+                z,
+                int(system.visited),
+                system.body_count,
+                json.dumps(stars),
+            ),
+        )
+        self.connection.execute(
+            "DELETE FROM planets WHERE system_address = ?", (address,)
+        )
+        self.connection.execute(
+            "DELETE FROM bio_signals WHERE system_address = ?", (address,)
+        )
+        self.connection.executemany(
+            "INSERT INTO planets VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    address,
+                    body_id,
+                    planet.model_dump_json(exclude={"signals"}),
+                    *planet.leaderboard_values,
+                )
+                for body_id, planet in system.planets.items()
+            ],
+        )
+        self.connection.executemany(
+            "INSERT INTO bio_signals VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    address,
+                    body_id,
+                    position,
+                    signal.species.genus,
+                    signal.species.species,
+                    int(signal.genus_found),
+                    int(signal.species_found),
+                )
+                for body_id, planet in system.planets.items()
+                for position, signal in enumerate(planet.signals)
+            ],
+        )
+
+    def delete_system(self, system_address: int) -> None:
+        with self.connection:
+            for table in ("systems", "planets", "bio_signals"):
+                self.connection.execute(
+                    f"DELETE FROM {table} WHERE system_address = ?", (system_address,)
+                )
+
+    def get_meta(self, key: str) -> str | None:
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value)
+            )
+
+
+def system_digest(system: System) -> bytes:
+    return hashlib.blake2b(system.model_dump_json().encode(), digest_size=16).digest()
+
+
+class StoredSystems(MutableMapping[int, System]):
+    """
+    `Galaxy.systems` backed by a SystemBackend. Systems are loaded on first access into
+    a bounded LRU. Anything read since the last flush may have been changed in place, so
+    on `flush`, or when it falls out of the LRU, it's compared with what was loaded and
+    written back only if it differs.
+    """
+
+    def __init__(self, store: SystemBackend, capacity: int = 256) -> None:
+        self.store = store
+        self.capacity = capacity
+        self.cache: OrderedDict[int, System] = OrderedDict()
+        self.touched: set[int] = set()
+        self.digests: dict[int, bytes] = {}
+        """Digest of what the store holds for each cached system."""
+
+    def __getitem__(self, system_address: int) -> System:
+        system = self.cache.get(system_address)
+        if system is None:
+            system = self.store.load_system(system_address)
+            if system is None:
+                raise KeyError(system_address)
+            self.cache[system_address] = system
+            self.digests[system_address] = system_digest(system)
+            self.evict()
+        else:
+            self.cache.move_to_end(system_address)
+        self.touched.add(system_address)
+        return system
+
+    def __setitem__(self, system_address: int, system: System) -> None:
+        self.cache[system_address] = system
+        self.cache.move_to_end(system_address)
+        self.touched.add(system_address)
+        self.evict()
+
+    def __delitem__(self, system_address: int) -> None:
+        self.cache.pop(system_address, None)
+        self.touched.discard(system_address)
+        self.digests.pop(system_address, None)
+        self.store.delete_system(system_address)
+
+    def __contains__(self, system_address: object) -> bool:
+        if system_address in self.cache:
+            return True
+        return isinstance(system_address, int) and self.store.has_system(system_address)
+
+    def __iter__(self) -> Iterator[int]:
+        self.flush()
+        return self.store.system_addresses()
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.store.system_count()
+
+    def peek(self, system_address: int) -> System | None:
+        """Look a system up without moving it in the LRU or caching it, for reading only."""
+        system = self.cache.get(system_address)
+        if system is None:
+            system = self.store.load_system(system_address)
+        return system
+
+    def changed(self, systems: Iterable[System]) -> list[System]:
+        """The systems that differ from what's stored, which are about to be written."""
+        changed = []
+        for system in systems:
+            digest = system_digest(system)
+            if self.digests.get(system.system_address) != digest:
+                self.digests[system.system_address] = digest
+                changed.append(system)
+        return changed
+
+    def write_back(self, systems: Iterable[System]) -> None:
+        changed = self.changed(systems)
+        if len(changed) > 0:
+            self.store.save_systems(changed)
+
+    def evict(self) -> None:
+        while len(self.cache) > self.capacity:
+            address, system = self.cache.popitem(last=False)
+            if address in self.touched:
+                # write back everything pending while at it, one transaction instead
+                # of one per evicted system when many are being added
+                self.touched.discard(address)
+                pending = [
+                    self.cache[x] for x in sorted(self.touched) if x in self.cache
+                ]
+                self.write_back([system, *pending])
+                self.touched = set()
+            self.digests.pop(address, None)
+
+    def flush(self) -> None:
+        """Write back every changed system read or added since the last flush."""
+        if len(self.touched) == 0:
+            return
+        self.write_back(self.cache[x] for x in sorted(self.touched) if x in self.cache)
+        self.touched = set()
+
+
+def open_galaxy(store: SystemBackend, capacity: int = 256) -> Galaxy:
+    """A Galaxy whose systems live in `store`, positioned where the last run left off."""
+    systems = StoredSystems(store, capacity)
+    if -1 not in systems:
+        systems[-1] = Galaxy().systems[-1]
+    current_system_id = int(store.get_meta("current_system_id") or -1)
+    # model_construct keeps the mapping as-is, validation would copy it into a dict
+    galaxy = Galaxy.model_construct(
+        systems=systems, current_system_id=current_system_id
+    )
+    galaxy._stored = systems
+    galaxy._saved_system_id = current_system_id
+    galaxy._unindexed = store.positions
+    galaxy._explored_source = store.explored_systems
+    galaxy._unranked = store.ranked_planets
+    return galaxy
@@ -0,0 +1,52 @@
+import pytest
+
+from db.compact import CompactStore, compact_system, expand_system
+from db.galaxy import Star
+from db.store import open_galaxy
+from db.test_store import make_system
+from signals import rules
+from signals.signals import Flora, species_list
+
+
+def test_round_trip() -> None:
+    system = make_system(10)
+    system.planets[4].BodyName = "Test 10 AB 4"
+    system.planets[4].system_name = "Test 10"
+    system.planets[4].mapped_by_player = True
+    system.planets[4].signals[1].species_found = True
+    system.stars[0] = Star(
+        SystemAddress=10,
+        BodyID=0,
+        BodyName="Test 10 A",
+        system_name="Test 10",
+        star_class="K",
+    )
+
+    record = compact_system(system)
+
+    assert record.planets[0].body_name == " AB 4"
+    assert expand_system(record) == system
+
+
+def test_galaxy_over_compact_store() -> None:
+    galaxy = open_galaxy(CompactStore(), capacity=2)
+    for address in range(1, 6):
+        galaxy.systems[address] = make_system(address)
+    galaxy.systems[1].planets[4].was_mapped = True
+    galaxy.flush()
+
+    assert len(galaxy.systems.cache) == 2  # type: ignore[attr-defined]
+    assert galaxy.systems[3] == make_system(3)
+    assert galaxy.systems[1].planets[4].was_mapped is True
+
+
+def test_signals_survive_a_catalog_rebuild(monkeypatch: pytest.MonkeyPatch) -> None:
+    record = compact_system(make_system(10))
+    added = Flora(genus="Added", species="first", value=1, min_distance_between=1)
+    monkeypatch.setattr(rules, "species_list", [added, *species_list])
+    assert rules.get_species_index().species[0] == added
+
+    expanded = expand_system(record)
+    assert [x.species for x in expanded.planets[4].signals] == [
+        x.species for x in make_system(10).planets[4].signals
+    ]
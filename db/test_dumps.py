@@ -0,0 +1,154 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from db.dumps import (
+    ImportReport,
+    atmosphere_from_dump,
+    import_dump,
+    progress_path_for,
+    read_dump,
+)
+from db.compact import CompactStore
+from db.galaxy import Galaxy
+from db.store import GalaxyStore, SystemBackend, open_galaxy
+from db.test_store import make_system
+
+
+def spansh_system(address: int) -> dict:
+    return {
+        "id64": address,
+        "name": f"Dump {address}",
+        "coords": {"x": address, "y": 0, "z": 0},
+        "bodyCount": 2,
+        "bodies": [
+            {"bodyId": 0, "name": f"Dump {address} A", "type": "Star"},
+            {
+                "bodyId": 1,
+                "name": f"Dump {address} 1",
+                "type": "Planet",
+                "subType": "High metal content world",
+                "terraformingState": "Candidate for terraforming",
+                "earthMasses": 0.5,
+                "gravity": 0.08,
+                "surfaceTemperature": 170,
+                "atmosphereType": "Thin Carbon dioxide",
+                "signals": {"signals": {"$SAA_SignalType_Biological;": 2}},
+            },
+        ],
+    }
+
+
+def write_dump(path: str, records: list[dict]) -> None:
+    with gzip.open(path, "wt") as file:
+        file.write("[\n")
+        file.write(",\n".join(json.dumps(x) for x in records))
+        file.write("\n]\n")
+
+
+def test_atmospheres_match_the_journal() -> None:
+    assert atmosphere_from_dump("Thin Carbon dioxide-rich") == "CarbonDioxideRich"
+    assert atmosphere_from_dump("Thick Ammonia") == "Ammonia"
+    assert atmosphere_from_dump("No atmosphere") == "None"
+
+
+def test_read_dump_strips_array_syntax(tmp_path: Path) -> None:
+    path = str(tmp_path / "galaxy.json.gz")
+    write_dump(path, [spansh_system(x) for x in range(5)])
+
+    batches = list(read_dump(path, batch_size=2))
+    assert [len(x) for _, x in batches] == [2, 2, 1]
+    assert all(json.loads(x)["id64"] >= 0 for _, lines in batches for x in lines)
+    # picking up from the end of the first batch gives the rest
+    rest = list(read_dump(path, offset=batches[0][0], batch_size=2))
+    assert rest == batches[1:]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_maps_bodies(tmp_path: Path, workers: int) -> None:
+    path = str(tmp_path / "galaxy.json.gz")
+    edsm_body = {
+        "systemId64": 10,
+        "systemName": "Test 10",
+        "bodyId": 9,
+        "name": "Test 10 9",
+        "type": "Planet",
+        "subType": "Icy body",
+        "gravity": 0.02,
+    }
+    write_dump(path, [spansh_system(x) for x in range(1, 7)] + [edsm_body])
+    galaxy = Galaxy(systems={10: make_system(10)})
+
+    report = import_dump(galaxy, path, workers=workers, batch_size=2)
+
+    assert (report.systems, report.bodies) == (7, 7)
+    planet = galaxy.systems[3].planets[1]
+    assert planet.planet_class == "High metal content body"
+    assert planet.terraformable and planet.atmosphere == "CarbonDioxide"
+    assert planet.gravity == pytest.approx(0.08)
+    assert len(planet.signals) > 0
+    assert galaxy.systems_within(1.5, origin=[3, 0, 0])[0][1] == 3
+    # the player's own data is kept, the dump only adds to it
+    kept = galaxy.systems[10].planets[4]
+    assert kept.model_dump() == make_system(10).planets[4].model_dump()
+    assert galaxy.systems[10].planets[9].planet_class == "Icy body"
+
+
+def test_import_resumes_after_interruption(tmp_path: Path) -> None:
+    path = str(tmp_path / "galaxy.json.gz")
+    write_dump(path, [spansh_system(x) for x in range(1, 7)])
+    store = GalaxyStore(str(tmp_path / "galaxy.sqlite3"))
+
+    def stop(report: ImportReport) -> None:
+        if report.systems >= 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_dump(open_galaxy(store), path, batch_size=2, on_batch=stop)
+    with open(progress_path_for(path)) as file:
+        assert json.load(file)[1]["systems"] == 2
+
+    report = import_dump(open_galaxy(store), path, batch_size=2)
+    assert report.systems == 4
+    assert store.system_count() == 7  # and the -1 placeholder
+    assert import_dump(open_galaxy(store), path).systems == 0
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "compact"])
+def test_systems_get_coordinates_from_a_later_dump(
+    tmp_path: Path, backend: str
+) -> None:
+    store: SystemBackend
+    if backend == "sqlite":
+        store = GalaxyStore(str(tmp_path / "galaxy.sqlite3"))
+    else:
+        store = CompactStore()
+    bodies = str(tmp_path / "bodies.json.gz")
+    systems = str(tmp_path / "systems.json.gz")
+    body = spansh_system(3)["bodies"][1]
+    write_dump(bodies, [{**body, "systemId64": 3, "systemName": "Dump 3"}])
+    write_dump(systems, [spansh_system(3)])
+
+    import_dump(open_galaxy(store), bodies)
+    assert list(store.positions()) == []
+    assert open_galaxy(store).systems_within(1e6, origin=[0, 0, 0]) == []
+
+    import_dump(open_galaxy(store), systems)
+    assert list(store.positions()) == [(3, 3.0, 0.0, 0.0)]
+    assert open_galaxy(store).systems[3].planets[1].was_mapped is True
+
+
+def test_stored_import_leaves_positions_to_the_store(tmp_path: Path) -> None:
+    path = str(tmp_path / "galaxy.json.gz")
+    write_dump(path, [spansh_system(x) for x in range(1, 41)])
+    galaxy = open_galaxy(GalaxyStore(str(tmp_path / "galaxy.sqlite3")), capacity=4)
+
+    import_dump(galaxy, path, batch_size=8)
+
+    # nothing held per imported system outside the LRU
+    assert len(galaxy._index) == 0
+    assert galaxy._explored_source is not None
+    assert [x for _, x in galaxy.systems_within(1.5, origin=[20, 0, 0])] == [20, 19, 21]
+    assert len(galaxy.nearest_unexplored(3, origin=[40, 0, 0])) == 3
@@ -1,4 +1,9 @@
-from shapes import bio_signal_factory, planet_factory
+import pytest
+from pydantic import ValidationError
+
+from db.galaxy import Planet, genus_value_bounds
+from journal_reader.journal_models import DSSSignalEvent, Genus
+from shapes import bio_signal_factory, event_factory, planet_factory
 from utils.values import ROCKY
 from signals.signals import species_list
 
@@ -65,3 +70,83 @@ def test_make_bio_values() -> None:
     assert values.max == 7_774_700
     assert values.actual == 0
     assert values.bonuses == 0
+
+
+def test_planet_values_cached_until_inputs_change() -> None:
+    rocky_planet = planet_factory(planet_class=ROCKY, mapped_by_player=False)
+    first = rocky_planet.cartographic_values_actual
+    hits = Planet.valuation_hits
+    assert rocky_planet.cartographic_values_actual is first
+    assert Planet.valuation_hits == hits + 1
+
+    rocky_planet.signal_count = 3
+    assert rocky_planet.cartographic_values_actual is first
+
+    rocky_planet.mapped_by_player = True
+    assert round(rocky_planet.cartographic_values_actual.mapped) == 1181
+
+
+def test_planet_values_cache_is_not_part_of_the_model() -> None:
+    cached = planet_factory(planet_class=ROCKY)
+    cached.cartographic_values_actual
+    cached.genus_bounds
+    fresh = planet_factory(planet_class=ROCKY)
+    assert cached == fresh
+    assert cached.model_dump() == fresh.model_dump()
+
+
+def test_bio_values_compare_numerically() -> None:
+    """19,010,800 sorts before 2,352,400 as a string."""
+    concha = {x.species: x for x in species_list if x.genus == "Concha"}
+    bacterium = [x for x in species_list if x.genus == "Bacterium"]
+    planet = planet_factory(
+        signal_count=2,
+        signals=[
+            bio_signal_factory(species=concha["biconcavis"]),
+            bio_signal_factory(species=concha["labiata"]),
+            *[bio_signal_factory(species=x) for x in bacterium],
+        ],
+    )
+
+    values = planet.bio_signal_values
+
+    assert values.min == 2_352_400 + 1_000_000
+    assert values.max == 19_010_800 + 5_289_900
+
+
+def test_dss_keeps_only_found_genera() -> None:
+    planet = planet_factory(
+        signal_count=1,
+        signals=[bio_signal_factory(species=x) for x in species_list],
+    )
+    assert planet.bio_signal_values.max == 19_010_800
+
+    planet.update_signals_from_dss(
+        DSSSignalEvent(
+            **event_factory(event="SAASignalsFound").model_dump(),
+            BodyID=planet.BodyID,
+            SystemAddress=planet.SystemAddress,
+            Genuses=[
+                Genus(
+                    Genus="$Codex_Ent_Bacterial_Genus_Name;",
+                    Genus_Localised="Bacterium",
+                )
+            ],
+        )
+    )
+
+    assert planet.bio_signal_values.min == 1_000_000
+    assert planet.bio_signal_values.max == 5_289_900
+    assert planet.genus_bounds == genus_value_bounds(planet.signals)
+
+
+def test_genus_bounds_follow_changed_signals() -> None:
+    bacterium = [x for x in species_list if x.genus == "Bacterium"]
+    planet = planet_factory(signal_count=1, signals=[])
+    assert planet.genus_bounds == {}
+
+    planet.signals = tuple(bio_signal_factory(species=x) for x in bacterium)
+    assert planet.genus_bounds == genus_value_bounds(planet.signals)
+    # signals can't be changed behind the cache's back
+    with pytest.raises(ValidationError):
+        planet.signals[0].genus_found = True
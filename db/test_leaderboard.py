@@ -0,0 +1,157 @@
+import random
+
+import pytest
+
+from db.compact import CompactStore
+from db.dumps import merge_system
+from db.galaxy import Galaxy, System
+from db.leaderboard import IndexedHeap
+from db.snapshot import load_snapshot, save_snapshot
+from db.store import GalaxyStore, open_galaxy
+from db.test_store import make_system
+from journal_reader.journal_models import DSSEvent, ScanOrganicEvent
+from shapes import (
+    bio_signal_factory,
+    event_factory,
+    planet_factory,
+    scan_event_factory,
+)
+from signals.signals import species_list
+
+
+def test_heap_matches_sorting() -> None:
+    rng = random.Random(7)
+    heap: IndexedHeap[int] = IndexedHeap()
+    expected: dict[int, float] = {}
+    for _ in range(2_000):
+        key = rng.randrange(200)
+        if rng.random() < 0.2:
+            heap.remove(key)
+            expected.pop(key, None)
+        else:
+            value = rng.uniform(0, 1_000)
+            heap.set(key, value)
+            expected[key] = value
+
+        assert len(heap) == len(expected)
+        best = sorted(((v, k) for k, v in expected.items()), reverse=True)[:10]
+        assert [v for v, _ in heap.top(10)] == [v for v, _ in best]
+
+    assert all(heap.get(k) == v for k, v in expected.items())
+
+
+def test_galaxy_ranks_bodies_as_events_arrive() -> None:
+    system = make_system(10)
+    galaxy = Galaxy(systems={10: system}, current_system_id=10)
+    assert galaxy.best_bio_targets(5) == [
+        (system.planets[4].bio_signal_values.max, (10, 4))
+    ]
+
+    galaxy.add_planet_from_scan(
+        scan_event_factory(
+            SystemAddress=10, BodyID=7, PlanetClass="Earthlike body", MassEM=1
+        )
+    )
+    top = galaxy.best_mapped_targets(5)
+    assert top[0][1] == (10, 7)
+    assert [x for _, x in top] == [(10, 7), (10, 4)]
+
+    galaxy.map_planet(
+        DSSEvent(
+            **event_factory(event="SAAScanComplete").model_dump(),
+            SystemAddress=10,
+            BodyName="Test 10 7",
+            BodyID=7,
+            ProbesUsed=5,
+            EfficiencyTarget=6,
+        )
+    )
+    assert [x for _, x in galaxy.best_mapped_targets(5)] == [(10, 4)]
+
+
+def analyse(genus: str, species: str) -> ScanOrganicEvent:
+    return ScanOrganicEvent(
+        **event_factory(event="ScanOrganic").model_dump(),
+        ScanType="Analyse",
+        Genus_Localised=genus,
+        Species_Localised=f"{genus} {species.capitalize()}",
+        Variant_Localised=f"{genus} {species.capitalize()} - Green",
+        SystemAddress=10,
+        Body=4,
+    )
+
+
+def test_sampled_genera_leave_the_bio_leaderboard() -> None:
+    system = make_system(10)
+    planet = system.planets[4]
+    planet.signals = tuple(
+        bio_signal_factory(species=x)
+        for x in species_list
+        if x.genus in ("Bacterium", "Concha")
+    )
+    galaxy = Galaxy(systems={10: system}, current_system_id=10)
+    concha = planet.genus_bounds["Concha"][1]
+    bacterium = planet.genus_bounds["Bacterium"][1]
+    assert galaxy.best_bio_targets(1) == [(concha + bacterium, (10, 4))]
+
+    galaxy.sample_organic(analyse("Concha", "labiata"))
+    assert galaxy.best_bio_targets(1) == [(bacterium, (10, 4))]
+    # the genus is down to the species that was sampled
+    assert [
+        x.species.species for x in planet.signals if x.species.genus == "Concha"
+    ] == ["labiata"]
+
+    galaxy.sample_organic(analyse("Bacterium", "tela"))
+    assert galaxy.best_bio_targets(1) == []
+
+
+def ranked_system(address: int) -> System:
+    system = make_system(address)
+    system.planets[7] = planet_factory(
+        BodyID=7, SystemAddress=address, planet_class="Earthlike body", mass=1
+    )
+    return system
+
+
+def reopen(backend: str, systems: list[System], tmp_path) -> Galaxy:
+    if backend == "snapshot":
+        path = str(tmp_path / "galaxy.snapshot")
+        save_snapshot(Galaxy(systems={x.system_address: x for x in systems}), path)
+        return load_snapshot(path)
+    if backend == "sqlite":
+        store: GalaxyStore | CompactStore = GalaxyStore(
+            str(tmp_path / "galaxy.sqlite3")
+        )
+    else:
+        store = CompactStore()
+    store.save_systems(systems)
+    return open_galaxy(store)
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "compact", "snapshot"])
+def test_reopened_galaxies_keep_their_leaderboards(backend: str, tmp_path) -> None:
+    systems = [ranked_system(x) for x in (10, 11)]
+    expected = Galaxy(systems={x.system_address: x for x in systems})
+    galaxy = reopen(backend, [ranked_system(x) for x in (10, 11)], tmp_path)
+
+    # changed before the boards were read, the backend has to be up to date
+    galaxy.systems[11].planets[7].mapped_by_player = True
+    expected.systems[11].planets[7].mapped_by_player = True
+    expected.rank_planet(expected.systems[11].planets[7])
+
+    assert galaxy.best_mapped_targets(5) == expected.best_mapped_targets(5)
+    assert (11, 7) not in [x for _, x in galaxy.best_mapped_targets(5)]
+    assert len(galaxy.best_mapped_targets(5)) == 3
+    assert galaxy.best_bio_targets(5) == expected.best_bio_targets(5)
+    assert len(galaxy.best_bio_targets(5)) == 2
+
+    galaxy.systems[10].planets[7].mapped_by_player = True
+    galaxy.rank_planet(galaxy.systems[10].planets[7])
+    assert (10, 7) not in [x for _, x in galaxy.best_mapped_targets(5)]
+
+
+def test_imported_planets_are_ranked() -> None:
+    galaxy = Galaxy()
+    merge_system(galaxy, ranked_system(10))
+    assert [x for _, x in galaxy.best_mapped_targets(5)] == [(10, 7), (10, 4)]
+    assert [x for _, x in galaxy.best_bio_targets(5)] == [(10, 4)]
@@ -0,0 +1,112 @@
+from db.galaxy import Galaxy, System
+from db.route import RoutePlanner, system_value
+from db.store import GalaxyStore, StoredSystems, open_galaxy
+from shapes import bio_signal_factory, planet_factory
+from signals.signals import species_list
+
+
+def line_galaxy(valuable: set[int]) -> Galaxy:
+    """Systems every 10 ly along x, the ones in `valuable` with an unmapped planet."""
+    systems = {}
+    for address in range(10):
+        system = System(
+            system_name=f"Line {address}",
+            system_address=address,
+            star_pos=[address * 10, 0, 0],
+        )
+        if address in valuable:
+            system.planets[1] = planet_factory(SystemAddress=address, BodyID=1)
+        systems[address] = system
+    return Galaxy(systems=systems, current_system_id=0)
+
+
+def test_system_value_skips_mapped_planets() -> None:
+    galaxy = line_galaxy({3})
+    planet = galaxy.systems[3].planets[1]
+    assert (
+        system_value(galaxy.systems[3])
+        == planet.cartographic_values_estimate.total_value
+    )
+
+    planet.mapped_by_player = True
+    assert system_value(galaxy.systems[3]) == 0
+
+
+def test_system_value_leaves_out_sampled_genera() -> None:
+    galaxy = line_galaxy({3})
+    planet = galaxy.systems[3].planets[1]
+    planet.mapped_by_player = True
+    planet.signal_count = 2
+    planet.signals = tuple(
+        bio_signal_factory(species=x)
+        for x in species_list
+        if x.genus in ("Bacterium", "Concha")
+    )
+    assert system_value(galaxy.systems[3]) == planet.bio_value_left > 0
+
+    planet.signals = tuple(
+        x.model_copy(update={"species_found": True}) for x in planet.signals
+    )
+    assert system_value(galaxy.systems[3]) == 0
+
+
+def test_routes_collect_value_along_the_way() -> None:
+    planner = RoutePlanner(line_galaxy({3, 6}), jump_range=30)
+    routes = list(planner.plan())
+
+    assert [x.systems for x in routes] == [[3], [3, 6]]
+    assert routes[1].value == planner.value(3) + planner.value(6)
+    assert routes[1].distance == 60
+    assert routes[1].value_per_jump == routes[1].value / 2
+
+
+def test_prefers_valuable_stopovers() -> None:
+    galaxy = line_galaxy({9})
+    galaxy.systems[4].star_pos = [20, -5, 0]
+    galaxy.systems[5].star_pos = [20, 5, 0]
+    galaxy.systems[5].planets[1] = planet_factory(SystemAddress=5, BodyID=1)
+    galaxy.systems[9].star_pos = [40, 0, 0]
+    for address in (1, 2, 3, 6, 7, 8):
+        del galaxy.systems[address]
+    moved = Galaxy(systems=galaxy.systems, current_system_id=0)
+    planner = RoutePlanner(moved, jump_range=25, max_jumps=2)
+
+    assert [x.systems for x in planner.plan()] == [[5], [5, 9]]
+
+
+def test_max_jumps_limits_the_search() -> None:
+    planner = RoutePlanner(line_galaxy({9}), jump_range=15, max_jumps=5)
+    assert list(planner.plan()) == []
+
+
+def test_planning_leaves_a_stored_galaxy_alone(tmp_path) -> None:
+    store = GalaxyStore(str(tmp_path / "galaxy.sqlite3"))
+    store.save_systems(line_galaxy({3, 6}).systems.values())
+    galaxy = open_galaxy(store, capacity=4)
+    galaxy.current_system_id = 0
+    assert isinstance(galaxy.systems, StoredSystems)
+
+    routes = list(RoutePlanner(galaxy, jump_range=30).plan())
+
+    assert [x.systems for x in routes] == [[3], [3, 6]]
+    assert list(galaxy.systems.cache) == [-1]
+
+
+def test_a_stored_index_is_read_in_slices(tmp_path) -> None:
+    store = GalaxyStore(str(tmp_path / "galaxy.sqlite3"))
+    store.save_systems(line_galaxy({3, 6}).systems.values())
+    galaxy = open_galaxy(store, capacity=4)
+
+    slices = galaxy.index_positions(batch=4)
+    next(slices)
+    assert len(galaxy._index) == 4
+    # systems arriving in the meantime go straight into the index
+    galaxy.systems[20] = System(
+        system_name="Far", system_address=20, star_pos=[200, 0, 0]
+    )
+    galaxy.index_system(galaxy.systems[20])
+    assert len(galaxy._index) == 5
+
+    assert len(galaxy.spatial_index) == 11
+    assert list(slices) == []
+    assert [x for _, x in galaxy.spatial_index.within((200, 0, 0), 1)] == [20]
@@ -0,0 +1,91 @@
+import pytest
+
+from db.galaxy import Galaxy
+from db import snapshot
+from db.snapshot import (
+    SnapshotError,
+    SnapshotStore,
+    load_snapshot,
+    save_snapshot,
+    write_snapshot,
+)
+from db.store import StoredSystems
+from db.test_store import make_system
+
+
+def test_round_trip_is_lazy(tmp_path) -> None:
+    path = str(tmp_path / "galaxy.snapshot")
+    galaxy = Galaxy(systems={x: make_system(x) for x in range(1, 50)})
+    galaxy.current_system_id = 7
+    assert save_snapshot(galaxy, path) == 49
+
+    loaded = load_snapshot(path)
+    assert list(loaded.systems.cache) == [-1]  # type: ignore[attr-defined]
+    assert loaded.current_system == make_system(7)
+    assert list(loaded.systems.cache) == [-1, 7]  # type: ignore[attr-defined]
+    assert loaded.systems_within(0.5, origin=[30, 0.5, -2]) == [(0.0, 30)]
+
+
+def test_changes_are_saved_again(tmp_path) -> None:
+    path = str(tmp_path / "galaxy.snapshot")
+    save_snapshot(Galaxy(systems={x: make_system(x) for x in range(1, 5)}), path)
+
+    loaded = load_snapshot(path, capacity=1)
+    loaded.systems[2].planets[4].mapped_by_player = True
+    loaded.systems[10] = make_system(10)
+    del loaded.systems[3]
+    save_snapshot(loaded, path)
+    assert loaded.systems[4] == make_system(4)  # read from the new file
+
+    reloaded = load_snapshot(path)
+    assert sorted(reloaded.systems) == [-1, 1, 2, 4, 10]
+    assert reloaded.systems[2].planets[4].mapped_by_player is True
+    assert reloaded.systems[10] == make_system(10)
+
+
+def test_rejects_other_files(tmp_path) -> None:
+    path = tmp_path / "not.snapshot"
+    path.write_bytes(b"definitely not a snapshot, but long enough")
+    with pytest.raises(SnapshotError):
+        SnapshotStore(str(path))
+
+
+def test_saving_over_the_loaded_file_unmaps_it_first(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = str(tmp_path / "galaxy.snapshot")
+    save_snapshot(Galaxy(systems={x: make_system(x) for x in range(1, 5)}), path)
+    loaded = load_snapshot(path)
+    assert isinstance(loaded.systems, StoredSystems)
+    store = loaded.systems.store
+    assert isinstance(store, SnapshotStore)
+    replace = snapshot.os.replace
+
+    def windows_replace(src: str, dst: str) -> None:
+        # Windows refuses to replace a file that's mapped
+        assert store.map.closed
+        replace(src, dst)
+
+    monkeypatch.setattr(snapshot.os, "replace", windows_replace)
+    assert save_snapshot(loaded, path) == 5
+    assert store.system_count() == 5
+
+
+def test_systems_are_written_in_address_order(tmp_path) -> None:
+    path = str(tmp_path / "galaxy.snapshot")
+    with pytest.raises(SnapshotError):
+        write_snapshot(path, [make_system(2), make_system(1)], {})
+
+
+def test_systems_without_coordinates_have_no_position(tmp_path) -> None:
+    path = str(tmp_path / "galaxy.snapshot")
+    unplaced = make_system(2)
+    unplaced.star_pos = []
+    write_snapshot(path, [make_system(1), unplaced], {})
+
+    store = SnapshotStore(path)
+    assert [x for x, *_ in store.positions()] == [1]
+    store.save_systems(
+        [make_system(3), unplaced.model_copy(update={"system_address": 4})]
+    )
+    assert [x for x, *_ in store.positions()] == [1, 3]
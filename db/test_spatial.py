@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from db.compact import CompactStore
+from db.galaxy import Galaxy
+from db.spatial import SectorGrid
+from db.store import GalaxyStore, StoredSystems, SystemBackend, open_galaxy
+from db.test_store import make_system
+from journal_reader.journal_models import DSSEvent, FSDJumpEvent
+from shapes import event_factory
+
+
+def random_grid(count: int = 2000) -> SectorGrid:
+    rng = random.Random(3)
+    grid = SectorGrid(cell_size=50)
+    for address in range(count):
+        grid.insert(address, [rng.uniform(-1000, 1000) for _ in range(3)])
+    return grid
+
+
+def brute_force(grid: SectorGrid, origin: list[float]) -> list[tuple[float, int]]:
+    return sorted((grid.distance(x, origin), x) for x in grid.positions)
+
+
+def test_within_matches_brute_force() -> None:
+    grid = random_grid()
+    origin = [12.5, -300, 40]
+    expected = [x for x in brute_force(grid, origin) if x[0] <= 180]
+    assert grid.within(origin, 180) == expected
+    # larger than the whole grid, goes through occupied cells instead
+    assert grid.within(origin, 5000) == brute_force(grid, origin)
+
+
+def test_nearest_matches_brute_force() -> None:
+    grid = random_grid()
+    for origin in ([0.0, 0.0, 0.0], [999.0, -999.0, 999.0], [5000.0, 0.0, 0.0]):
+        assert grid.nearest(origin, 7) == brute_force(grid, origin)[:7]
+    # close to the faces of their cells, where rings further out come nearest
+    for origin in ([99.9, 50.0, -50.0], [-0.1, 250.0, 399.9]):
+        assert grid.nearest(origin, 20) == brute_force(grid, origin)[:20]
+
+    odd = grid.nearest([0, 0, 0], 5, accept=lambda x: x % 2 == 1)
+    assert odd == [x for x in brute_force(grid, [0, 0, 0]) if x[1] % 2 == 1][:5]
+
+
+def test_moving_a_system() -> None:
+    grid = SectorGrid(cell_size=10)
+    grid.insert(1, [0, 0, 0])
+    grid.insert(1, [100, 0, 0])
+    assert len(grid) == 1
+    assert grid.within([0, 0, 0], 50) == []
+    assert grid.nearest([0, 0, 0], 1) == [(100.0, 1)]
+
+
+def test_jump_indexes_system(testing_galaxy: Galaxy) -> None:
+    jump = FSDJumpEvent(
+        **event_factory(event="FSDJump").model_dump(),
+        StarSystem="Next door",
+        SystemAddress=99,
+        StarPos=[3, 4, 0],
+    )
+    testing_galaxy.jump_to_system(jump)
+
+    assert testing_galaxy.systems_within(10, origin=[0, 0, 0]) == [
+        (0.0, 12345),
+        (5.0, 99),
+    ]
+    # the testing system has an unmapped planet, the current one doesn't count
+    assert testing_galaxy.nearest_unexplored(3) == [(5.0, 12345)]
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "compact"])
+def test_stored_galaxy_finds_unexplored_without_loading(tmp_path, backend: str) -> None:
+    store: SystemBackend
+    if backend == "sqlite":
+        store = GalaxyStore(str(tmp_path / "galaxy.sqlite3"))
+    else:
+        store = CompactStore()
+    systems = [make_system(x) for x in range(1, 6)]
+    for system in systems[::2]:
+        system.planets[4].mapped_by_player = True
+    systems[1].visited = False
+    store.save_systems(systems)
+    galaxy = open_galaxy(store)
+    galaxy.current_system_id = 5
+
+    assert galaxy.nearest_unexplored(5) == [(1.0, 4), (3.0, 2)]
+    # only the current system is loaded, for its position
+    assert isinstance(galaxy.systems, StoredSystems)
+    assert list(galaxy.systems.cache) == [-1, 5]
+
+    galaxy.map_planet(
+        DSSEvent(
+            **event_factory(event="SAAScanComplete").model_dump(),
+            SystemAddress=5,
+            BodyName="Test 5 4",
+            BodyID=4,
+            ProbesUsed=5,
+            EfficiencyTarget=6,
+        )
+    )
+    galaxy.current_system_id = 1
+    assert [x for _, x in galaxy.nearest_unexplored(5)] == [2, 4]
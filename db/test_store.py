@@ -0,0 +1,132 @@
+from db.galaxy import Galaxy, System
+from db.store import GalaxyStore, StoredSystems, open_galaxy
+from journal_reader.journal_models import DSSEvent, FSDJumpEvent
+from shapes import (
+    bio_signal_factory,
+    event_factory,
+    planet_factory,
+    scan_event_factory,
+)
+from signals.signals import species_list
+from trip_logger.trip import Trip
+
+
+def make_system(address: int) -> System:
+    system = System(
+        system_name=f"Test {address}",
+        system_address=address,
+        star_pos=[address, 0.5, -2],
+        visited=True,
+        body_count=3,
+    )
+    system.planets[4] = planet_factory(
+        BodyID=4,
+        SystemAddress=address,
+        signal_count=2,
+        signals=[
+            bio_signal_factory(genus_found=True),
+            bio_signal_factory(species=species_list[1]),
+        ],
+    )
+    return system
+
+
+def test_round_trip(tmp_path) -> None:
+    path = str(tmp_path / "galaxy.sqlite3")
+    store = GalaxyStore(path)
+    store.save_systems([make_system(10)])
+    store.close()
+
+    assert GalaxyStore(path).load_system(10) == make_system(10)
+
+
+def test_lru_is_bounded_and_written_back(tmp_path) -> None:
+    path = str(tmp_path / "galaxy.sqlite3")
+    systems = StoredSystems(GalaxyStore(path), capacity=4)
+    for address in range(1, 21):
+        systems[address] = make_system(address)
+        assert len(systems.cache) <= 4
+
+    # changed in place after being loaded, saved when it's evicted again
+    systems[1].planets[4].mapped_by_player = True
+    for address in range(2, 8):
+        systems[address]
+    systems.flush()
+    systems.store.close()
+
+    reopened = StoredSystems(GalaxyStore(path), capacity=4)
+    assert len(reopened) == 20
+    assert reopened[1].planets[4].mapped_by_player is True
+    assert reopened[20] == make_system(20)
+
+
+def test_galaxy_resumes_at_current_system(tmp_path) -> None:
+    path = str(tmp_path / "galaxy.sqlite3")
+    galaxy = open_galaxy(GalaxyStore(path))
+    jump = FSDJumpEvent(
+        **event_factory(event="FSDJump").model_dump(),
+        StarSystem="Resumed",
+        SystemAddress=77,
+        StarPos=[1, 2, 3],
+    )
+    galaxy.jump_to_system(jump)
+    galaxy.flush()
+
+    resumed = open_galaxy(GalaxyStore(path))
+    assert resumed.current_system.system_name == "Resumed"
+    assert Galaxy().current_system_id == -1
+
+
+class CountingStore(GalaxyStore):
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.written: list[int] = []
+
+    def write_system(self, system: System) -> None:
+        self.written.append(system.system_address)
+        super().write_system(system)
+
+
+def test_only_changed_systems_are_written_back(tmp_path) -> None:
+    path = str(tmp_path / "galaxy.sqlite3")
+    GalaxyStore(path).save_systems([make_system(x) for x in range(1, 4)])
+    store = CountingStore(path)
+    systems = StoredSystems(store, capacity=2)
+
+    for address in (1, 2, 3, 1):
+        systems[address]
+    systems.flush()
+    assert store.written == []
+
+    systems[1].planets[4].mapped_by_player = True
+    systems.flush()
+    assert store.written == [1]
+
+
+def test_trip_follows_planets_reloaded_by_the_lru(tmp_path) -> None:
+    galaxy = open_galaxy(GalaxyStore(str(tmp_path / "galaxy.sqlite3")), capacity=2)
+    trip = Trip(galaxy, lambda: None, lambda key: None, lambda: None)
+    galaxy.systems[10] = make_system(10)
+    galaxy.current_system_id = 10
+    trip.add_entries([scan_event_factory(SystemAddress=10, BodyID=4)])
+
+    for address in range(11, 15):
+        galaxy.systems[address] = make_system(address)
+    assert isinstance(galaxy.systems, StoredSystems)
+    assert 10 not in galaxy.systems.cache
+    galaxy.current_system_id = 10
+    trip.add_entries(
+        [
+            DSSEvent(
+                **event_factory(event="SAAScanComplete").model_dump(),
+                SystemAddress=10,
+                BodyName="Test 10 4",
+                BodyID=4,
+                ProbesUsed=5,
+                EfficiencyTarget=6,
+            )
+        ]
+    )
+
+    assert [x.mapped_by_player for x in trip.bodies_scanned] == [True]
+    assert trip.bodies_mapped_value > 0
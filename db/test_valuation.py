@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from db.galaxy import Planet
+from shapes import planet_factory
+from utils.values import GAS_GIANT_II, HMCB, ICY, PLANET_VALUES, ROCKY, WATER_WORLD
+
+valuation = pytest.importorskip("db.valuation")
+
+
+def random_planets(count: int = 2000) -> list[Planet]:
+    rng = random.Random(7)
+    classes = [ROCKY, ICY, HMCB, WATER_WORLD, GAS_GIANT_II, *PLANET_VALUES]
+    return [
+        planet_factory(
+            planet_class=rng.choice(classes),
+            terraformable=rng.random() < 0.3,
+            was_discovered=rng.random() < 0.5,
+            was_mapped=rng.random() < 0.5,
+            mapped_by_player=rng.random() < 0.5,
+            mass=rng.choice([None, rng.uniform(0.0001, 5000)]),
+        )
+        for _ in range(count)
+    ]
+
+
+def test_matches_scalar_values_exactly() -> None:
+    planets = random_planets()
+    values = valuation.planet_values(planets)
+    for i, planet in enumerate(planets):
+        scalar = planet.cartographic_values_actual
+        assert values.base[i] == scalar.base
+        assert values.mapped[i] == scalar.mapped
+        assert values.bonuses[i] == scalar.bonuses
+        assert values.total_value[i] == scalar.total_value
+
+
+def test_estimate_treats_every_planet_as_mapped() -> None:
+    planets = random_planets(200)
+    values = valuation.planet_values(planets, mapped_by_player=True)
+    for i, planet in enumerate(planets):
+        assert values.bonuses[i] == planet.cartographic_values_estimate.bonuses
+
+
+def test_sequential_sum_matches_builtin() -> None:
+    planets = random_planets()
+    values = valuation.planet_values(planets)
+    expected = sum(x.cartographic_values_actual.bonuses for x in planets)
+    assert valuation.sequential_sum(values.bonuses) == expected
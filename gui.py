@@ -1,19 +1,36 @@
-from typing import Callable
+import heapq
+import time
+from typing import Callable, Iterator
 
 import ttkbootstrap as tb
 
 
-from db.galaxy import BioSignal, Galaxy, Planet
-from journal_reader.journal_reader import JournalReader
+from db.galaxy import BioSignal, BodyKey, Galaxy, Planet
+from db.route import Route, RoutePlanner
+from journal_reader.ingestion import IngestionQueue
+from journal_reader.journal_reader import TRIP_BOUNDARY_EVENTS, EventSource
 from trip_logger.trip import Trip
 
+INGESTION_INTERVAL_MS = 50
+INGESTION_BUDGET_S = 0.015
+ROUTE_SUGGESTIONS = 10
+ROUTE_INTERVAL_MS = 100
+ROUTE_BUDGET_S = 0.02
+DEFAULT_JUMP_RANGE = 50.0
+
 
 def styledLabel(text: str, **kwargs) -> tb.Label:
     return tb.Label(text=text, **kwargs)
 
 
 class GUI:
-    def __init__(self, reader: JournalReader, tk, galaxy: Galaxy) -> None:
+    def __init__(
+        self,
+        reader: EventSource,
+        tk,
+        galaxy: Galaxy,
+        jump_range: float = DEFAULT_JUMP_RANGE,
+    ) -> None:
         self.log = reader.log
         self.tk_instance = tk
         self.trip = Trip(
@@ -22,26 +39,36 @@ class GUI:
             add_body_to_ui=self.add_to_system,
             clear_system=self.clear_system,
         )
-        reader.set_trip(self.trip)
+        # the watcher threads only fill this queue, Tk widgets are touched from
+        # drain_ingestion on the main loop
+        self.ingestion = IngestionQueue()
+        reader.set_sink(self.ingestion.put_batch)
+        self.schedule_ingestion()
 
         self.notebook = tb.Notebook(self.tk_instance)
-        self.route_tab = tb.Frame(self.notebook)
+        self.route_tab = RouteTab(tb.Frame(self.notebook), self.trip.galaxy, jump_range)
         self.system_tab = SystemTab(tb.Frame(self.notebook), self.trip.galaxy)
         self.summary_tab = tb.Frame(self.notebook)
 
+    def schedule_ingestion(self) -> None:
+        self.tk_instance.after(INGESTION_INTERVAL_MS, self.drain_ingestion)
+
+    def drain_ingestion(self) -> None:
+        self.ingestion.drain(self.trip.add_entries, budget=INGESTION_BUDGET_S)
+        self.schedule_ingestion()
+
     def clear_system(self) -> None:
         self.system_tab.clear()
+        self.route_tab.refresh()
 
     def refresh_system_tab(self) -> None:
         self.system_tab.refresh()
 
-    def add_to_system(self, body: Planet) -> None:
-        self.system_tab.append_body(body)
+    def add_to_system(self, key: BodyKey) -> None:
+        self.system_tab.append_body(key)
 
     def build_trip_snapshot(self) -> None:
-        events = self.log.get_until_event(
-            ["SellExplorationData", "SellOrganicData"], reverse=True
-        )
+        events = self.log.get_until_event(TRIP_BOUNDARY_EVENTS, reverse=True)
         self.trip.add_entries(events)
 
         summary_frame = tb.Frame(master=self.tk_instance)
@@ -77,7 +104,7 @@ class GUI:
         bonuses_label.grid(row=1, column=2, rowspan=2)
 
     def setup_tabs(self) -> None:
-        self.notebook.add(self.route_tab, text="Route")
+        self.notebook.add(self.route_tab.parent, text="Route")
         self.notebook.add(self.system_tab.parent, text="Current system")
         self.notebook.add(self.summary_tab, text="Summary")
 
@@ -85,6 +112,8 @@ class GUI:
 
     def build_tab_contents(self) -> None:
         self.system_tab.build_headers()
+        self.route_tab.build_headers()
+        self.route_tab.refresh()
 
 
 class SignalLabel:
@@ -145,22 +174,25 @@ class BodyLabel:
         master: tb.Frame,
         *,
         update_func: Callable[[Planet], str],
-        body: Planet,
+        body: Callable[[], Planet],
         dynamic: bool = False,
     ) -> None:
         self.update_func = update_func
         self.body = body
-        self.label = tb.Label(master, text=self.update_func(self.body))
+        self.label = tb.Label(master, text=self.update_func(self.body()))
         self.dynamic = dynamic
 
     def do_update(self) -> None:
-        self.label.config(text=self.update_func(self.body))
+        self.label.config(text=self.update_func(self.body()))
 
 
 class BodyRow:
-    def __init__(self, parent_frame: tb.Frame, *, y: int, body: Planet) -> None:
+    def __init__(
+        self, parent_frame: tb.Frame, *, y: int, key: BodyKey, galaxy: Galaxy
+    ) -> None:
         self.y = y
-        self.body = body
+        self.key = key
+        self.galaxy = galaxy
         self.signal_frame = tb.Frame(parent_frame)
         self.signals: list[SignalRow] = [
             SignalRow(self.signal_frame, signal=signal) for signal in self.body.signals
@@ -169,33 +201,44 @@ class BodyRow:
             BodyLabel(
                 parent_frame,
                 update_func=lambda x: x.name,
-                body=self.body,
+                body=self.get_body,
             ),
             BodyLabel(
                 parent_frame,
                 update_func=lambda x: x.planet_class
                 if x.planet_class is not None
                 else "",
-                body=self.body,
+                body=self.get_body,
             ),
             BodyLabel(
                 parent_frame,
                 update_func=lambda x: f"{x.cartographic_values_estimate.total_value:,}",
-                body=self.body,
+                body=self.get_body,
                 dynamic=True,
             ),
             BodyLabel(
                 parent_frame,
                 update_func=lambda x: f"{x.signal_count or ''}",
-                body=self.body,
+                body=self.get_body,
             ),
             BodyLabel(
                 parent_frame,
                 update_func=lambda x: x.bio_signal_value_label,
-                body=self.body,
+                body=self.get_body,
             ),
         ]
 
+    @property
+    def body(self) -> Planet:
+        return self.get_body()
+
+    def get_body(self) -> Planet:
+        # looked up every time, a stored galaxy may have reloaded the planet
+        planet = self.galaxy.planet(self.key)
+        if planet is None:
+            raise KeyError(self.key)
+        return planet
+
     def place_children(self) -> None:
         for x, child in enumerate(self.children):
             child.label.grid(row=self.y * 2, column=x, sticky="ew")
@@ -257,8 +300,8 @@ class SystemTab:
         for body in self.rows:
             body.do_update()
 
-    def append_body(self, body: Planet) -> None:
-        row = BodyRow(self.frame, y=self.body_count, body=body)
+    def append_body(self, key: BodyKey) -> None:
+        row = BodyRow(self.frame, y=self.body_count, key=key, galaxy=self.galaxy)
         self.rows.append(row)
         self.sort_bodies()
         row.place_children()
@@ -271,10 +314,95 @@ class SystemTab:
             header_label.place_self(i)
 
     def sort_bodies(self) -> None:
-        new_order = sorted(
-            [x for x in self.bodies.values()],
-            key=lambda x: x.cartographic_values_estimate.total_value,
-            reverse=True,
-        )
+        new_order = [
+            x.BodyID
+            for x in sorted(
+                self.bodies.values(),
+                key=lambda x: x.cartographic_values_estimate.total_value,
+                reverse=True,
+            )
+        ]
         for row in self.rows:
-            row.move_to(new_order.index(row.body) + 1)
+            row.move_to(new_order.index(row.key[1]) + 1)
+
+
+class RouteTab:
+    """
+    Most valuable routes from the current system, by value per jump. Planning runs in
+    short slices on the Tk loop, and the table is redrawn whenever a better route turns
+    up.
+    """
+
+    def __init__(self, parent: tb.Frame, galaxy: Galaxy, jump_range: float) -> None:
+        self.galaxy = galaxy
+        self.parent = parent
+        self.jump_range = jump_range
+        self.frame = tb.Frame(self.parent)
+        self.frame.pack()
+        self.labels: list[tb.Label] = []
+        self.headers: list[HeaderLabel] = []
+        self.routes: list[tuple[float, int, Route]] = []
+        self.planning: Iterator[Route | None] | None = None
+        self.scheduled = False
+
+    def build_headers(self) -> None:
+        for i, header in enumerate(
+            ["Destination", "Jumps", "Distance", "Value", "Per jump"]
+        ):
+            header_label = HeaderLabel(self.frame, text=header)
+            self.headers.append(header_label)
+            header_label.place_self(i)
+
+    def refresh(self) -> None:
+        """Start planning from the current system again."""
+        self.routes = []
+        self.planning = RoutePlanner(self.galaxy, self.jump_range).steps()
+        self.show_routes()
+        if not self.scheduled:
+            self.scheduled = True
+            self.parent.after(ROUTE_INTERVAL_MS, self.plan_some)
+
+    def plan_some(self) -> None:
+        if self.planning is not None:
+            deadline = time.perf_counter() + ROUTE_BUDGET_S
+            changed = False
+            for route in self.planning:
+                if route is None:
+                    pass
+                elif len(self.routes) < ROUTE_SUGGESTIONS:
+                    heapq.heappush(self.routes, route_key(route))
+                    changed = True
+                elif route.value_per_jump > self.routes[0][0]:
+                    heapq.heapreplace(self.routes, route_key(route))
+                    changed = True
+                if time.perf_counter() >= deadline:
+                    break
+            else:
+                self.planning = None
+            if changed:
+                self.show_routes()
+        self.parent.after(ROUTE_INTERVAL_MS, self.plan_some)
+
+    def show_routes(self) -> None:
+        for label in self.labels:
+            label.destroy()
+        self.labels = []
+        best = sorted(self.routes, reverse=True)
+        for row, (_, _, route) in enumerate(best, start=1):
+            system = self.galaxy.peek_system(route.systems[-1])
+            texts = [
+                "" if system is None else system.system_name,
+                str(len(route.systems)),
+                f"{route.distance:,.1f} ly",
+                f"{round(route.value):,}",
+                f"{round(route.value_per_jump):,}",
+            ]
+            for column, text in enumerate(texts):
+                label = tb.Label(self.frame, text=text)
+                label.grid(row=row, column=column)
+                self.labels.append(label)
+
+
+def route_key(route: Route) -> tuple[float, int, Route]:
+    # ties go to the route with fewer jumps
+    return (route.value_per_jump, -len(route.systems), route)
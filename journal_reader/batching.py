@@ -0,0 +1,43 @@
+import threading
+from typing import Callable, Iterable
+
+from journal_reader.journal_models import JournalEvent
+
+
+class EventBatcher:
+    """
+    Coalesces events that arrive within `window` seconds of the first one into a single
+    delivery, so a burst of journal writes (an FSS sweep, a honk) reaches the Trip as one
+    batch instead of one call per line.
+    """
+
+    def __init__(
+        self, deliver: Callable[[list[JournalEvent]], None], window: float = 0.25
+    ) -> None:
+        self.deliver = deliver
+        self.window = window
+        self.pending: list[JournalEvent] = []
+        self.timer: threading.Timer | None = None
+        self.lock = threading.Lock()
+
+    def add(self, events: Iterable[JournalEvent]) -> None:
+        with self.lock:
+            self.pending.extend(events)
+            if len(self.pending) == 0 or self.timer is not None:
+                return
+            if self.window > 0:
+                self.timer = threading.Timer(self.window, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            batch = self.pending
+            self.pending = []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if len(batch) > 0:
+            self.deliver(batch)
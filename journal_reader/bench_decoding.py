@@ -0,0 +1,144 @@
+"""
+Per-line decoding cost, before and after the discriminated-union decoder.
+
+    python -m journal_reader.bench_decoding [journal file]
+
+Without a file a synthetic journal is used, with roughly the mix of events an
+exploration session produces (lots of Scans and FSS signals between jumps, plus the
+Music/ReceiveText/Status noise that isn't mapped at all).
+"""
+
+import json
+import random
+import sys
+import timeit
+
+from journal_reader.decoding import decode_event
+from journal_reader.journal_models import JournalEvent, event_mapping
+
+
+def legacy_decode(line: str) -> JournalEvent | None:
+    """Decoder as it was before the union: json.loads, mapping lookup, kwargs copy."""
+    parsed = json.loads(line)
+    event_type = event_mapping.get(parsed["event"], None)
+    if event_type is not None:
+        return event_type(**parsed)
+    return None
+
+
+def synthetic_journal(count: int = 5_000, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    lines: list[str] = []
+    system_address = 1000
+    for i in range(count):
+        timestamp = f"2024-06-09T{(i // 3600) % 24:02}:{(i // 60) % 60:02}:{i % 60:02}Z"
+        roll = rng.random()
+        base = {"timestamp": timestamp}
+        if roll < 0.05:
+            system_address += 1
+            event = {
+                **base,
+                "event": "FSDJump",
+                "StarSystem": f"Col 285 Sector AB-C d{system_address}",
+                "SystemAddress": system_address,
+                "StarPos": [rng.uniform(-1e4, 1e4) for _ in range(3)],
+                "JumpDist": 42.1,
+                "FuelUsed": 3.2,
+            }
+        elif roll < 0.40:
+            event = {
+                **base,
+                "event": "Scan",
+                "ScanType": rng.choice(["AutoScan", "Detailed"]),
+                "BodyName": f"Col 285 Sector AB-C d{system_address} {i % 12} a",
+                "BodyID": i % 40,
+                "StarSystem": f"Col 285 Sector AB-C d{system_address}",
+                "SystemAddress": system_address,
+                "DistanceFromArrivalLS": rng.uniform(10, 5000),
+                "TidalLock": True,
+                "TerraformState": "",
+                "PlanetClass": rng.choice(["Rocky body", "Icy body", "Water world"]),
+                "Atmosphere": "",
+                "AtmosphereType": rng.choice(["None", "Ammonia", "Nitrogen"]),
+                "Volcanism": "",
+                "MassEM": rng.uniform(0.001, 3),
+                "Radius": rng.uniform(1e5, 1e7),
+                "SurfaceGravity": rng.uniform(0.5, 20),
+                "SurfaceTemperature": rng.uniform(20, 900),
+                "SurfacePressure": 0.0,
+                "Landable": True,
+                "SemiMajorAxis": rng.uniform(1e6, 1e12),
+                "Rings": [],
+                "WasDiscovered": rng.random() < 0.5,
+                "WasMapped": False,
+            }
+        elif roll < 0.55:
+            event = {
+                **base,
+                "event": "FSSBodySignals",
+                "BodyName": "x",
+                "BodyID": i % 40,
+                "SystemAddress": system_address,
+                "Signals": [
+                    {
+                        "Type": "$SAA_SignalType_Biological;",
+                        "Type_Localised": "Biological",
+                        "Count": rng.randint(1, 4),
+                    }
+                ],
+            }
+        elif roll < 0.70:
+            event = {**base, "event": "Music", "MusicTrack": "Exploration"}
+        elif roll < 0.85:
+            event = {
+                **base,
+                "event": "ReceiveText",
+                "From": "",
+                "Message": "$COMMS_entered:#name=Col 285 Sector;",
+                "Channel": "npc",
+            }
+        else:
+            event = {
+                **base,
+                "event": "FSSDiscoveryScan",
+                "Progress": 0.5,
+                "BodyCount": 24,
+                "NonBodyCount": 3,
+                "SystemName": "x",
+                "SystemAddress": system_address,
+            }
+        lines.append(json.dumps(event))
+    return lines
+
+
+def per_line_microseconds(decode: object, lines: list[str], repeat: int = 5) -> float:
+    def run() -> None:
+        for line in lines:
+            decode(line)  # type: ignore[operator]
+
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return best / len(lines) * 1e6
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8", errors="replace") as file:
+            lines = [x for x in file.read().splitlines() if x.strip()]
+    else:
+        lines = synthetic_journal()
+
+    mapped = [x for x in lines if json.loads(x)["event"] in event_mapping]
+    assert [legacy_decode(x) for x in mapped] == [decode_event(x) for x in mapped]
+
+    print(f"{len(lines)} lines, {len(mapped)} mapped")
+    for label, sample in (("all lines", lines), ("mapped only", mapped)):
+        before = per_line_microseconds(legacy_decode, sample)
+        after = per_line_microseconds(decode_event, sample)
+        print(
+            f"{label:>12}: before {before:6.2f} us/line, after {after:6.2f} us/line"
+            f" ({before / after:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from journal_reader.journal_models import JournalEvent, event_mapping
+
+# bump when the on-disk layout changes in a way the model fingerprint can't see
+CACHE_FORMAT_VERSION = 1
+
+
+def default_cache_path() -> str:
+    return os.path.join(str(Path.home()), ".explo-helper", "journal_cache.pickle")
+
+
+def models_fingerprint() -> str:
+    """Hash of every mapped event model's schema, so editing journal_models drops the cache."""
+    hasher = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+    for name, model in sorted(event_mapping.items()):
+        hasher.update(name.encode())
+        hasher.update(
+            json.dumps(TypeAdapter(model).json_schema(), sort_keys=True).encode()
+        )
+    return hasher.hexdigest()
+
+
+@dataclass
+class CachedJournal:
+    size: int
+    mtime_ns: int
+    inode: int
+    offset: int
+    """Bytes consumed up to the last complete line."""
+    events: list[JournalEvent] = field(default_factory=list)
+
+    def is_unchanged(self, stat: os.stat_result) -> bool:
+        return (
+            self.inode == stat.st_ino
+            and self.size == stat.st_size
+            and self.mtime_ns == stat.st_mtime_ns
+        )
+
+    def is_prefix_of(self, stat: os.stat_result) -> bool:
+        """Journals are append-only, so a larger file with the same inode only grew."""
+        return self.inode == stat.st_ino and self.offset <= stat.st_size
+
+
+class JournalCache:
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or default_cache_path()
+        self.fingerprint = models_fingerprint()
+        self.entries: dict[str, CachedJournal] = {}
+
+    def load(self) -> None:
+        self.entries = {}
+        try:
+            with open(self.path, "rb") as file:
+                fingerprint, entries = pickle.load(file)
+        except (
+            OSError,
+            EOFError,
+            pickle.UnpicklingError,
+            AttributeError,
+            ImportError,
+            ValueError,
+            TypeError,
+        ):
+            # missing, corrupt, or written against classes that have since moved
+            return
+        if fingerprint == self.fingerprint:
+            self.entries = entries
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as file:
+            pickle.dump(
+                (self.fingerprint, self.entries), file, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        self.entries = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, path: str) -> CachedJournal | None:
+        return self.entries.get(path)
+
+    def put(
+        self,
+        path: str,
+        stat: os.stat_result,
+        offset: int,
+        events: list[JournalEvent],
+    ) -> None:
+        self.entries[path] = CachedJournal(
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            inode=stat.st_ino,
+            offset=offset,
+            events=events,
+        )
+
+    def prune(self, keep: set[str]) -> None:
+        self.entries = {k: v for k, v in self.entries.items() if k in keep}
@@ -0,0 +1,69 @@
+import json
+import re
+from typing import Any, Callable
+
+from pydantic import TypeAdapter
+
+from journal_reader.journal_models import JournalEvent, MappedEvent, event_mapping
+
+JsonLoads = Callable[[str], Any]
+
+# the game always writes "timestamp" then "event" first, so the first match is the
+# top-level event name
+EVENT_NAME_REGEX = re.compile(r'"event"\s*:\s*"([^"]*)"')
+
+TIMESTAMP_REGEX = re.compile(r'"timestamp"\s*:\s*"([^"]*)"')
+
+mapped_event_adapter: TypeAdapter[MappedEvent] = TypeAdapter(MappedEvent)
+
+json_loads: JsonLoads | None = None
+"""None validates raw JSON directly in pydantic-core, the fastest path."""
+
+
+def set_json_backend(loads: JsonLoads | None = None) -> None:
+    """
+    Route journal lines through another JSON decoder before validation. Pass None to go
+    back to validating the raw JSON in a single pass.
+    """
+    global json_loads
+    json_loads = loads
+
+
+def use_orjson() -> bool:
+    """Use orjson when it's installed, returning whether it was."""
+    try:
+        import orjson
+    except ImportError:
+        return False
+    set_json_backend(orjson.loads)
+    return True
+
+
+def peek_event_type(line: str) -> str | None:
+    match = EVENT_NAME_REGEX.search(line)
+    if match is None:
+        return None
+    return match.group(1)
+
+
+def peek_timestamp(line: str) -> str | None:
+    match = TIMESTAMP_REGEX.search(line)
+    if match is None:
+        return None
+    return match.group(1)
+
+
+def decode_event(line: str) -> JournalEvent | None:
+    """Decode a raw journal line, dropping unmapped event types before the full parse."""
+    event_name = peek_event_type(line)
+    if event_name is None:
+        # unusual layout, check the event name the slow way
+        parsed = (json_loads or json.loads)(line)
+        if parsed.get("event") not in event_mapping:
+            return None
+        return mapped_event_adapter.validate_python(parsed)
+    if event_name not in event_mapping:
+        return None
+    if json_loads is None:
+        return mapped_event_adapter.validate_json(line)
+    return mapped_event_adapter.validate_python(json_loads(line))
@@ -0,0 +1,204 @@
+import calendar
+import json
+import time
+from abc import abstractmethod
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence, overload
+
+from journal_reader.journal_models import JournalEvent
+
+MISSING = -(2**63)
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+COLUMN_FIELDS = {"timestamp", "event", "SystemAddress", "BodyID"}
+
+
+def timestamp_to_epoch(timestamp: str) -> int:
+    """Journal timestamps are always UTC, 'YYYY-MM-DDTHH:MM:SSZ'. Anything else is MISSING."""
+    if len(timestamp) != 20 or timestamp[10] != "T" or timestamp[19] != "Z":
+        return MISSING
+    try:
+        return calendar.timegm(
+            (
+                int(timestamp[0:4]),
+                int(timestamp[5:7]),
+                int(timestamp[8:10]),
+                int(timestamp[11:13]),
+                int(timestamp[14:16]),
+                int(timestamp[17:19]),
+            )
+        )
+    except ValueError:
+        return MISSING
+
+
+def epoch_to_timestamp(epoch: int) -> str:
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(epoch))
+
+
+class EncodedEvent(NamedTuple):
+    epoch: int
+    system_address: int
+    body_id: int
+    payload: bytes
+
+
+@lru_cache(maxsize=None)
+def payload_fields(event_class: type[JournalEvent]) -> tuple[str, ...]:
+    return tuple(x for x in event_class.model_fields if x not in COLUMN_FIELDS)
+
+
+def encode_event(event: JournalEvent) -> EncodedEvent:
+    """Split an event into its columns and a key-less JSON array of the other fields."""
+    epoch = timestamp_to_epoch(event.timestamp)
+    dumped = event.model_dump(mode="json")
+    values = [dumped[x] for x in payload_fields(type(event))]
+    if epoch == MISSING or epoch_to_timestamp(epoch) != event.timestamp:
+        # doesn't round-trip through the epoch column, keep the original string
+        epoch = MISSING
+        values.append(event.timestamp)
+    return EncodedEvent(
+        epoch=epoch,
+        system_address=dumped.get("SystemAddress", MISSING),
+        body_id=dumped.get("BodyID", -1),
+        payload=json.dumps(values, separators=(",", ":")).encode(),
+    )
+
+
+class EventStore(Sequence[JournalEvent]):
+    """What Log needs from its storage; subclasses decide how events are held."""
+
+    @abstractmethod
+    def append(self, event: JournalEvent, encoded: EncodedEvent | None = None) -> None:
+        pass
+
+    @abstractmethod
+    def event_type(self, index: int) -> str:
+        pass
+
+    @abstractmethod
+    def timestamp(self, index: int) -> str:
+        """The entry's timestamp, without decoding the whole event where possible."""
+
+    @abstractmethod
+    def materialize(self, index: int) -> JournalEvent:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @overload
+    def __getitem__(self, index: int) -> JournalEvent: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[JournalEvent]: ...
+
+    def __getitem__(self, index: int | slice) -> JournalEvent | list[JournalEvent]:
+        if isinstance(index, slice):
+            return [self.materialize(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        return self.materialize(index)
+
+    def __iter__(self) -> Iterator[JournalEvent]:
+        for i in range(len(self)):
+            yield self.materialize(i)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+
+class CompactEventStore(EventStore):
+    """
+    Struct-of-arrays event storage: epoch-second timestamps, an interned type code,
+    typed columns for SystemAddress/BodyID and the rest of each event as compact JSON.
+    Full models are only rebuilt when an event is read. Recently appended or read
+    events are kept in an LRU, so live events and hot entries aren't decoded again.
+    """
+
+    def __init__(
+        self, events: Iterable[JournalEvent] = (), cache_size: int = 1024
+    ) -> None:
+        self.epochs = array("q")
+        self.type_codes = array("H")
+        self.system_addresses = array("q")
+        self.body_ids = array("i")
+        self.payloads: list[bytes] = []
+        self.types: list[tuple[str, type[JournalEvent]]] = []
+        self.codes: dict[tuple[str, type[JournalEvent]], int] = {}
+        self.cache_size = cache_size
+        self.decoded: OrderedDict[int, JournalEvent] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        for event in events:
+            self.append(event)
+
+    def type_code(self, event: JournalEvent) -> int:
+        key = (event.event, type(event))
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.types)
+            self.types.append(key)
+        return code
+
+    def append(self, event: JournalEvent, encoded: EncodedEvent | None = None) -> None:
+        encoded = encoded or encode_event(event)
+        self.epochs.append(encoded.epoch)
+        self.type_codes.append(self.type_code(event))
+        self.system_addresses.append(encoded.system_address)
+        self.body_ids.append(encoded.body_id)
+        self.payloads.append(encoded.payload)
+        self.remember(len(self.payloads) - 1, event)
+
+    def remember(self, index: int, event: JournalEvent) -> None:
+        self.decoded[index] = event
+        if len(self.decoded) > self.cache_size:
+            self.decoded.popitem(last=False)
+
+    def event_type(self, index: int) -> str:
+        return self.types[self.type_codes[index]][0]
+
+    def timestamp(self, index: int) -> str:
+        if self.epochs[index] == MISSING:
+            return json.loads(self.payloads[index])[-1]
+        return epoch_to_timestamp(self.epochs[index])
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def materialize(self, index: int) -> JournalEvent:
+        event = self.decoded.get(index)
+        if event is not None:
+            self.hits += 1
+            self.decoded.move_to_end(index)
+            return event
+
+        self.misses += 1
+        event = self.decode(index)
+        self.remember(index, event)
+        return event
+
+    def decode(self, index: int) -> JournalEvent:
+        name, event_class = self.types[self.type_codes[index]]
+        values: list[Any] = json.loads(self.payloads[index])
+        if self.epochs[index] == MISSING:
+            timestamp = values.pop()
+        else:
+            timestamp = epoch_to_timestamp(self.epochs[index])
+        fields = dict(zip(payload_fields(event_class), values))
+        fields["timestamp"] = timestamp
+        fields["event"] = name
+        if self.system_addresses[index] != MISSING:
+            fields["SystemAddress"] = self.system_addresses[index]
+        if self.body_ids[index] != -1:
+            fields["BodyID"] = self.body_ids[index]
+        return event_class(**fields)
+
+    def __repr__(self) -> str:
+        return f"CompactEventStore({len(self)} events)"
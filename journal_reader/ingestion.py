@@ -0,0 +1,51 @@
+import queue
+import time
+from typing import Callable
+
+from journal_reader.journal_models import JournalEvent
+
+
+class IngestionQueue:
+    """
+    Bounded hand-off between the watcher threads, which fill it, and the Tk main loop,
+    which drains it. When the queue is full the watcher blocks, so a huge burst slows
+    ingestion down instead of growing memory.
+    """
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        self.queue: queue.Queue[JournalEvent] = queue.Queue(maxsize=maxsize)
+
+    def put_batch(self, events: list[JournalEvent]) -> None:
+        for event in events:
+            self.queue.put(event)
+
+    def take(self, count: int) -> list[JournalEvent]:
+        events: list[JournalEvent] = []
+        while len(events) < count:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def drain(
+        self,
+        handle: Callable[[list[JournalEvent]], None],
+        budget: float,
+        chunk_size: int = 50,
+    ) -> int:
+        """
+        Hand queued events to `handle` in chunks until the queue is empty or `budget`
+        seconds have been spent. Returns how many events were handled.
+        """
+        deadline = time.perf_counter() + budget
+        handled = 0
+        while True:
+            chunk = self.take(chunk_size)
+            if len(chunk) == 0:
+                break
+            handle(chunk)
+            handled += len(chunk)
+            if time.perf_counter() >= deadline:
+                break
+        return handled
@@ -1,5 +1,5 @@
-from typing import Any, Literal, Optional
-from pydantic import BaseModel
+from typing import Annotated, Any, Literal, Optional, Union
+from pydantic import BaseModel, Field
 
 
 EventType = (
@@ -28,6 +28,7 @@ class JournalEvent(BaseModel):
 
 
 class FSDJumpEvent(JournalEvent):
+    event: Literal["FSDJump"]
     StarSystem: str
     SystemAddress: int
     StarPos: list[float]
@@ -47,6 +48,7 @@ class GenericSignal(BaseModel):
 
 
 class FSSSignalEvent(JournalEvent):
+    event: Literal["FSSBodySignals"]
     BodyID: int
     SystemAddress: int
     Signals: list[GenericSignal] = []
@@ -58,6 +60,7 @@ class Genus(BaseModel):
 
 
 class DSSSignalEvent(JournalEvent):
+    event: Literal["SAASignalsFound"]
     BodyID: int
     SystemAddress: int
     Signals: list[GenericSignal] = []
@@ -65,6 +68,7 @@ class DSSSignalEvent(JournalEvent):
 
 
 class SellCartographicsEvent(JournalEvent):
+    event: Literal["SellExplorationData"]
     Systems: list[str]
     Discovered: list[str]
     BaseValue: int
@@ -81,10 +85,12 @@ class BioData(BaseModel):
 
 
 class SellOrganicDataEvent(JournalEvent):
+    event: Literal["SellOrganicData"]
     BioData: list[BioData]
 
 
 class ScanEvent(JournalEvent):
+    event: Literal["Scan"]
     ScanType: Literal["AutoScan"] | Literal["Detailed"] | Literal["Basic"]
     StarSystem: str
     SystemAddress: int
@@ -104,11 +110,13 @@ class ScanEvent(JournalEvent):
 
 
 class DiscoveryScanEvent(JournalEvent):
+    event: Literal["DiscoveryScan"]
     SystemAddress: int
     Bodies: int
 
 
 class ScanOrganicEvent(JournalEvent):
+    event: Literal["ScanOrganic"]
     ScanType: Literal["Log"] | Literal["Sample"] | Literal["Analyse"]
     Genus_Localised: str
     Species_Localised: str
@@ -118,6 +126,7 @@ class ScanOrganicEvent(JournalEvent):
 
 
 class DSSEvent(JournalEvent):
+    event: Literal["SAAScanComplete"]
     SystemAddress: int
     BodyName: str
     BodyID: int
@@ -125,7 +134,7 @@ class DSSEvent(JournalEvent):
     EfficiencyTarget: int
 
 
-event_mapping = {
+event_mapping: dict[str, type[JournalEvent]] = {
     "DiscoveryScan": DiscoveryScanEvent,
     "FSDJump": FSDJumpEvent,
     "FSSBodySignals": FSSSignalEvent,
@@ -136,3 +145,19 @@ event_mapping = {
     "SellExplorationData": SellCartographicsEvent,
     "SellOrganicData": SellOrganicDataEvent,
 }
+
+MappedEvent = Annotated[
+    Union[
+        DiscoveryScanEvent,
+        FSDJumpEvent,
+        FSSSignalEvent,
+        DSSEvent,
+        DSSSignalEvent,
+        ScanEvent,
+        ScanOrganicEvent,
+        SellCartographicsEvent,
+        SellOrganicDataEvent,
+    ],
+    Field(discriminator="event"),
+]
+"""Every mapped event, told apart by its `event` field in a single validation pass."""
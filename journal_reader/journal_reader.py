@@ -1,38 +1,152 @@
-import json
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+import mmap
 import re
 import os
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    NamedTuple,
+    Protocol,
+)
 
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
 from watchdog.observers import Observer
 from watchdog.observers.api import BaseObserver
-from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.events import (
+    FileCreatedEvent,
+    FileModifiedEvent,
+    FileSystemEventHandler,
+    FileSystemEvent,
+)
 
+from journal_reader.batching import EventBatcher
+from journal_reader.cache import JournalCache
+from journal_reader.decoding import decode_event, peek_event_type, peek_timestamp
+from journal_reader.event_store import (
+    CompactEventStore,
+    EventStore,
+    encode_event,
+)
 from journal_reader.journal_models import EventType, JournalEvent, event_mapping
+from journal_reader.mapped_store import MappedEventStore
+from journal_reader.names import JOURNAL_NAME_REGEX, journal_sort_key
+from journal_reader.reverse import complete_length, iter_lines_reversed
+from journal_reader.tailer import JournalTailer
+from journal_reader.watchers import ActiveJournalHandler, JournalPoller
 from trip_logger.trip import Trip
 
 
-JOURNAL_NAME_REGEX = r"Journal.\d+-\d+-\d+T\d+\.\d+\.log"
+TRIP_BOUNDARY_EVENTS: list[EventType] = ["SellExplorationData", "SellOrganicData"]
+MonitorMode = Literal["active", "directory", "poll"]
+
+
+def first_timestamp(file_name: str) -> str | None:
+    with open(file_name, "r", encoding="utf-8", errors="replace") as file:
+        return peek_timestamp(file.readline())
+
+
+class ParsedJournal(NamedTuple):
+    events: list[JournalEvent]
+    offset: int
+    inode: int
+
+
+def parse_journal_file(file_name: str, offset: int = 0) -> ParsedJournal:
+    """Parse a journal from offset onward. Module-level so process pools can pickle it."""
+    tailer = JournalTailer()
+    tailer.seek(file_name, offset, os.stat(file_name).st_ino)
+    events = Log().parse_lines(tailer.read_new_lines(file_name))
+    return ParsedJournal(
+        events, tailer.consumed(file_name), tailer.states[file_name].inode
+    )
+
+
+EventKey = tuple[str, str, int]
+
+
+def event_key(event: JournalEvent) -> EventKey:
+    """Identity of a journal entry; several entries can share a timestamp and type."""
+    encoded = encode_event(event)
+    return (
+        event.timestamp,
+        event.event,
+        hash((encoded.system_address, encoded.body_id, encoded.payload)),
+    )
 
 
 class Log(BaseModel):
-    events: list[JournalEvent] = []
+    """
+    Journal history. Only add to `events` through `append`/`append_ref`, which keep the
+    per-type position index in step with the store. The identity index behind
+    `find_event` is filled in lazily from timestamps and types alone; only entries
+    that share both with the event being looked up are decoded.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    events: EventStore = Field(default_factory=CompactEventStore)
+
+    _stamps: dict[tuple[str, str], list[int]] = PrivateAttr(default_factory=dict)
+    _stamped: int = PrivateAttr(0)
+    _positions: dict[str, list[int]] = PrivateAttr(default_factory=dict)
+
+    @field_validator("events", mode="before")
+    @classmethod
+    def compact_events(cls, value: Any) -> EventStore:
+        if isinstance(value, EventStore):
+            return value
+        return CompactEventStore(value)
+
+    def model_post_init(self, __context: Any) -> None:
+        for i in range(len(self.events)):
+            self.index_event(i, self.events.event_type(i))
+
+    def index_event(self, position: int, event_type: str) -> None:
+        self._positions.setdefault(event_type, []).append(position)
+
+    def index_pending_stamps(self) -> None:
+        for i in range(self._stamped, len(self.events)):
+            stamp = (self.events.timestamp(i), self.events.event_type(i))
+            self._stamps.setdefault(stamp, []).append(i)
+        self._stamped = len(self.events)
 
     def convert_str_to_event(self, data: str | JournalEvent) -> JournalEvent | None:
         if isinstance(data, JournalEvent):
             return data
-        parsed = json.loads(data)
-        event_type = event_mapping.get(parsed["event"], None)
-        if event_type is not None:
-            return event_type(**parsed)
+        return decode_event(data)
+
+    def parse_lines(self, lines: list[str]) -> list[JournalEvent]:
+        events = [self.convert_str_to_event(line) for line in lines]
+        return [x for x in events if x is not None]
 
-    def append(self, data: str | JournalEvent, trip: Trip | None = None) -> None:
+    def append(
+        self, data: str | JournalEvent, trip: Trip | None = None
+    ) -> JournalEvent | None:
         event = self.convert_str_to_event(data)
         if event is not None:
+            position = len(self.events)
+            self.index_event(position, event.event)
+            if self._stamped == position:
+                stamp = (event.timestamp, event.event)
+                self._stamps.setdefault(stamp, []).append(position)
+                self._stamped += 1
             self.events.append(event)
             if trip is not None:
                 trip.add_entries([event])
+        return event
+
+    def append_ref(self, path: str, offset: int, length: int, event_type: str) -> None:
+        """Record an event by its location in a journal without decoding it."""
+        if not isinstance(self.events, MappedEventStore):
+            raise TypeError("append_ref needs a Log backed by a MappedEventStore")
+        self.index_event(len(self.events), event_type)
+        self.events.append_ref(path, offset, length, event_type)
 
     def find_event(
         self, data: str | JournalEvent, reverse: bool = False
@@ -43,58 +157,65 @@ class Log(BaseModel):
         """
         event = self.convert_str_to_event(data) if isinstance(data, str) else data
         if event is None:
-            return
+            return None
 
-        dataset = [*self.events]
-        if reverse:
-            dataset = list(reversed(dataset))
-        for logged_event in dataset:
-            if (
-                event.timestamp == logged_event.timestamp
-                and event.event == logged_event.event
-            ):
-                return logged_event
+        self.index_pending_stamps()
+        positions = self._stamps.get((event.timestamp, event.event), [])
+        key = event_key(event)
+        for position in reversed(positions) if reverse else positions:
+            candidate = self.events[position]
+            if event_key(candidate) == key:
+                return candidate
+        return None
 
     def get_until_event(
         self, event_types: list[EventType], reverse: bool = False
     ) -> list[JournalEvent]:
         """Get all events (from start by default) until event of target type is found."""
-        matching_events: list[JournalEvent] = []
-        dataset = [*self.events]
+        positions = [self._positions[x] for x in event_types if self._positions.get(x)]
+        if len(positions) == 0:
+            return self.events[:]
         if reverse:
-            dataset = list(reversed(dataset))
-
-        for event in dataset:
-            if event.event in event_types:
-                break
-            matching_events.append(event)
-
-        if reverse:
-            matching_events = list(reversed(matching_events))
-        return matching_events
+            return self.events[max(x[-1] for x in positions) + 1 :]
+        return self.events[: min(x[0] for x in positions)]
 
 
 class JournalEventHandler(FileSystemEventHandler):
-    def __init__(self, log: Log, trip: Trip | None = None) -> None:
+    def __init__(
+        self,
+        log: Log,
+        trip: Trip | None = None,
+        tailer: JournalTailer | None = None,
+        batch_window: float = 0.25,
+    ) -> None:
         super().__init__()
         self.log = log
         self.trip = trip
+        self.sink: Callable[[list[JournalEvent]], None] | None = None
+        self.tailer = tailer or JournalTailer()
+        self.batcher = EventBatcher(self.deliver, window=batch_window)
 
     def set_trip(self, trip: Trip) -> None:
         self.trip = trip
 
+    def set_sink(self, sink: Callable[[list[JournalEvent]], None]) -> None:
+        """Send batches here instead of straight to the Trip, e.g. a queue the UI drains."""
+        self.sink = sink
+
+    def deliver(self, events: list[JournalEvent]) -> None:
+        if self.sink is not None:
+            self.sink(events)
+        elif self.trip is not None:
+            self.trip.add_entries(events)
+
+    def ingest(self, path: str) -> None:
+        lines = self.tailer.read_new_lines(path)
+        events = [self.log.append(line) for line in lines]
+        self.batcher.add(x for x in events if x is not None)
+
     def handler(self, event: FileSystemEvent) -> None:
         if re.search(JOURNAL_NAME_REGEX, event.src_path) is not None:
-            events_to_add: list[str] = []
-            with open(event.src_path, "r") as file:
-                for line in list(reversed(file.readlines())):
-                    match = self.log.find_event(line)
-                    if match is not None:
-                        break
-                    events_to_add.append(line)
-
-            for e in list(reversed(events_to_add)):
-                self.log.append(e, self.trip)
+            self.ingest(str(event.src_path))
 
     def on_created(self, event: FileSystemEvent) -> None:
         self.handler(event)
@@ -102,14 +223,41 @@ class JournalEventHandler(FileSystemEventHandler):
     def on_modified(self, event: FileSystemEvent) -> None:
         self.handler(event)
 
+    def on_deleted(self, event: FileSystemEvent) -> None:
+        self.tailer.forget(str(event.src_path))
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        self.tailer.forget(str(event.src_path))
+
+
+class EventSource(Protocol):
+    """What the GUI needs from whatever parses journals: history plus live batches."""
+
+    log: Log
+
+    def set_sink(self, sink: Callable[[list[JournalEvent]], None]) -> None: ...
+
 
 class JournalReader:
-    def __init__(self) -> None:
-        self.file_location = os.path.join(
+    def __init__(
+        self,
+        file_location: str | None = None,
+        cache: JournalCache | None = None,
+        workers: int = 1,
+        lazy: bool = False,
+        batch_window: float = 0.25,
+    ) -> None:
+        self.file_location = file_location or os.path.join(
             str(Path.home()), "Saved Games/Frontier Developments/Elite Dangerous"
         )
-        self.log = Log()
-        self.event_handler = JournalEventHandler(log=self.log)
+        self.cache = cache
+        self.workers = workers
+        self.lazy = lazy
+        self.log = Log(events=MappedEventStore()) if lazy else Log()
+        self.tailer = JournalTailer()
+        self.event_handler = JournalEventHandler(
+            log=self.log, tailer=self.tailer, batch_window=batch_window
+        )
 
     def get_journal_file_names(self) -> list[str]:
         result: list[str] = []
@@ -119,20 +267,189 @@ class JournalReader:
             for file in filtered_files:
                 result.append(os.path.join(path, file))
 
-        return result
+        return sorted(result, key=journal_sort_key)
 
     def compile_journals(self) -> None:
+        if self.lazy:
+            self.index_journals()
+            return
+
+        file_names = self.get_journal_file_names()
+        if self.cache is not None:
+            self.cache.load()
+
+        stats: dict[str, os.stat_result] = {}
+        cached_events: dict[str, list[JournalEvent]] = {}
+        jobs: list[tuple[str, int]] = []
+        for file_name in file_names:
+            stats[file_name] = stat = os.stat(file_name)
+            cached = self.cache.get(file_name) if self.cache is not None else None
+            if cached is None or not cached.is_prefix_of(stat):
+                jobs.append((file_name, 0))
+                continue
+            cached_events[file_name] = cached.events
+            if cached.is_unchanged(stat):
+                self.tailer.seek(file_name, cached.offset, stat.st_ino)
+            else:
+                jobs.append((file_name, cached.offset))
+
+        parsed = dict(zip([x[0] for x in jobs], self.parse_journal_files(jobs)))
+        for file_name in file_names:
+            events = cached_events.get(file_name, [])
+            if file_name in parsed:
+                result = parsed[file_name]
+                events = [*events, *result.events]
+                self.tailer.seek(file_name, result.offset, result.inode)
+                if self.cache is not None:
+                    self.cache.put(file_name, stats[file_name], result.offset, events)
+            for event in events:
+                self.log.append(event)
+
+        if self.cache is not None:
+            self.cache.prune(set(file_names))
+            self.cache.save()
+
+    def index_journals(self) -> None:
+        """
+        Lazy mode: record where every mapped event lives without decoding any of them.
+        Events are decoded from the journal on first access.
+        """
         for file_name in self.get_journal_file_names():
-            with open(file_name, "r") as file:
-                for line in file.readlines():
-                    self.log.append(line)
+            with open(file_name, "rb") as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_size == 0:
+                    # can't map an empty file, and there's nothing to index yet
+                    self.tailer.seek(file_name, 0, stat.st_ino)
+                    continue
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    offset = self.index_mapped_journal(file_name, data)
+            self.tailer.seek(file_name, offset, stat.st_ino)
+
+    def index_mapped_journal(self, file_name: str, data: mmap.mmap) -> int:
+        """append_ref every mapped event of a journal, returning the offset consumed."""
+        offset = 0
+        end = data.find(b"\n")
+        while end != -1:
+            line = data[offset:end].decode("utf-8", errors="replace")
+            event_type = peek_event_type(line)
+            if event_type in event_mapping:
+                self.log.append_ref(file_name, offset, end - offset, event_type)
+            offset = end + 1
+            end = data.find(b"\n", offset)
+        return offset
+
+    def parse_journal_files(self, jobs: list[tuple[str, int]]) -> list[ParsedJournal]:
+        """Parse (file name, start offset) jobs, in a process pool when workers > 1."""
+        file_names = [x[0] for x in jobs]
+        offsets = [x[1] for x in jobs]
+        if self.workers > 1 and len(jobs) > 1:
+            workers = min(self.workers, len(jobs))
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return list(
+                        executor.map(
+                            parse_journal_file,
+                            file_names,
+                            offsets,
+                            chunksize=max(1, len(jobs) // (workers * 4)),
+                        )
+                    )
+            except (OSError, NotImplementedError, BrokenProcessPool):
+                # no usable process pool on this platform, fall back to serial
+                pass
+        return [parse_journal_file(x, offset) for x, offset in jobs]
+
+    def load_current_trip(
+        self, boundary: Iterable[EventType] = TRIP_BOUNDARY_EVENTS
+    ) -> None:
+        """
+        Load only the events since the most recent boundary event (a sale by default),
+        walking journals newest first and reading each one backwards, so startup cost
+        follows the length of the current trip rather than the whole history.
+        """
+        stops = set(boundary)
+        newest_first: list[JournalEvent] = []
+        found_boundary = False
+        for file_name in reversed(self.get_journal_file_names()):
+            self.tailer.seek(
+                file_name, complete_length(file_name), os.stat(file_name).st_ino
+            )
+            for line in iter_lines_reversed(file_name):
+                event = decode_event(line)
+                if event is None:
+                    continue
+                newest_first.append(event)
+                if event.event in stops:
+                    found_boundary = True
+                    break
+            if found_boundary:
+                break
+
+        for event in reversed(newest_first):
+            self.log.append(event)
+
+    def iter_events(
+        self, since: str | None = None, types: Iterable[EventType] | None = None
+    ) -> Iterator[JournalEvent]:
+        """
+        Stream events from every journal in chronological order, one line at a time,
+        without keeping them in the Log. `since` is an ISO timestamp; only events at or
+        after it are yielded. `types` limits which event types are decoded at all.
+        """
+        wanted = set(types) if types is not None else None
+        file_names = self.get_journal_file_names()
+        if since is not None:
+            # file names are in local time, so compare against each file's first event
+            first = 0
+            for i in range(len(file_names) - 1, 0, -1):
+                start = first_timestamp(file_names[i])
+                if start is not None and start <= since:
+                    first = i
+                    break
+            file_names = file_names[first:]
+
+        for file_name in file_names:
+            with open(file_name, "r", encoding="utf-8", errors="replace") as file:
+                for line in file:
+                    if not line.endswith("\n"):
+                        # still being written
+                        break
+                    if wanted is not None and peek_event_type(line) not in wanted:
+                        continue
+                    if since is not None and (peek_timestamp(line) or "") < since:
+                        continue
+                    event = decode_event(line)
+                    if event is not None:
+                        yield event
 
     def set_trip(self, trip: Trip) -> None:
         self.event_handler.set_trip(trip)
 
-    def monitor_journals(self) -> BaseObserver:
+    def set_sink(self, sink: Callable[[list[JournalEvent]], None]) -> None:
+        self.event_handler.set_sink(sink)
+
+    def monitor_journals(
+        self, mode: MonitorMode = "active"
+    ) -> BaseObserver | JournalPoller:
+        """
+        "active" follows only the journal being written and ignores companion files,
+        "directory" handles every change in the journal folder, and "poll" stats the
+        active journal on a timer for filesystems without reliable notifications.
+        """
+        if mode == "poll":
+            poller = JournalPoller(self.event_handler, self.file_location)
+            poller.start()
+            return poller
+
         observer = Observer()
-        observer.schedule(self.event_handler, self.file_location)
+        if mode == "active":
+            observer.schedule(
+                ActiveJournalHandler(self.event_handler, self.file_location),
+                self.file_location,
+                event_filter=[FileCreatedEvent, FileModifiedEvent],
+            )
+        else:
+            observer.schedule(self.event_handler, self.file_location)
         observer.start()
 
         return observer
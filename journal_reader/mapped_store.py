@@ -0,0 +1,121 @@
+import mmap
+from array import array
+from collections import OrderedDict
+
+from journal_reader.decoding import decode_event, peek_timestamp
+from journal_reader.event_store import EncodedEvent, EventStore
+from journal_reader.journal_models import JournalEvent
+
+PINNED = 2**32 - 1
+"""File id for events that were appended as models rather than journal references."""
+
+
+class MappedEventStore(EventStore):
+    """
+    Keeps only (file id, byte offset, length, event type) per event and decodes the line
+    from a memory-mapped journal the first time it's read. Recently read events are kept
+    in an LRU so hot entries aren't decoded over and over.
+    """
+
+    def __init__(self, cache_size: int = 1024) -> None:
+        self.file_ids = array("I")
+        self.offsets = array("Q")
+        self.lengths = array("I")
+        self.type_codes = array("H")
+        self.type_names: list[str] = []
+        self.codes: dict[str, int] = {}
+        self.files: list[str] = []
+        self.file_ids_by_path: dict[str, int] = {}
+        self.maps: dict[int, mmap.mmap] = {}
+        self.pinned: dict[int, JournalEvent] = {}
+        self.cache_size = cache_size
+        self.decoded: OrderedDict[int, JournalEvent] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def file_id(self, path: str) -> int:
+        file_id = self.file_ids_by_path.get(path)
+        if file_id is None:
+            file_id = self.file_ids_by_path[path] = len(self.files)
+            self.files.append(path)
+        return file_id
+
+    def type_code(self, event_type: str) -> int:
+        code = self.codes.get(event_type)
+        if code is None:
+            code = self.codes[event_type] = len(self.type_names)
+            self.type_names.append(event_type)
+        return code
+
+    def append_ref(self, path: str, offset: int, length: int, event_type: str) -> None:
+        self.file_ids.append(self.file_id(path))
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.type_codes.append(self.type_code(event_type))
+
+    def append(self, event: JournalEvent, encoded: EncodedEvent | None = None) -> None:
+        """Live events that only exist in memory are held as-is."""
+        self.pinned[len(self)] = event
+        self.file_ids.append(PINNED)
+        self.offsets.append(0)
+        self.lengths.append(0)
+        self.type_codes.append(self.type_code(event.event))
+
+    def event_type(self, index: int) -> str:
+        return self.type_names[self.type_codes[index]]
+
+    def __len__(self) -> int:
+        return len(self.file_ids)
+
+    def mapped_file(self, file_id: int, end: int) -> mmap.mmap:
+        mapped = self.maps.get(file_id)
+        if mapped is None or len(mapped) < end:
+            # journals grow while the game runs, remap to see the new bytes
+            if mapped is not None:
+                mapped.close()
+            with open(self.files[file_id], "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[file_id] = mapped
+        return mapped
+
+    def line(self, index: int) -> str:
+        start = self.offsets[index]
+        end = start + self.lengths[index]
+        line = self.mapped_file(self.file_ids[index], end)[start:end]
+        return line.decode("utf-8", errors="replace")
+
+    def timestamp(self, index: int) -> str:
+        if self.file_ids[index] != PINNED and index not in self.decoded:
+            timestamp = peek_timestamp(self.line(index))
+            if timestamp is not None:
+                return timestamp
+        return self.materialize(index).timestamp
+
+    def materialize(self, index: int) -> JournalEvent:
+        file_id = self.file_ids[index]
+        if file_id == PINNED:
+            return self.pinned[index]
+
+        event = self.decoded.get(index)
+        if event is not None:
+            self.hits += 1
+            self.decoded.move_to_end(index)
+            return event
+
+        self.misses += 1
+        event = decode_event(self.line(index))
+        if event is None:
+            location = f"{self.files[file_id]}@{self.offsets[index]}"
+            raise ValueError(f"{location} is not a mapped event")
+        self.decoded[index] = event
+        if len(self.decoded) > self.cache_size:
+            self.decoded.popitem(last=False)
+        return event
+
+    def close(self) -> None:
+        for mapped in self.maps.values():
+            mapped.close()
+        self.maps = {}
+
+    def __repr__(self) -> str:
+        return f"MappedEventStore({len(self)} events, {len(self.files)} files)"
@@ -0,0 +1,26 @@
+import os
+import re
+
+JOURNAL_NAME_REGEX = r"Journal.\d+-\d+-\d+T\d+\.\d+\.log"
+
+
+def journal_sort_key(file_name: str) -> str:
+    """Journal names embed their start timestamp, so they sort chronologically."""
+    return os.path.basename(file_name)
+
+
+def is_journal_name(file_name: str) -> bool:
+    # cheap checks first so Status.json, Cargo.json etc. never reach the regex
+    return (
+        file_name.startswith("Journal.")
+        and file_name.endswith(".log")
+        and re.fullmatch(JOURNAL_NAME_REGEX, file_name) is not None
+    )
+
+
+def newest_journal(directory: str) -> str | None:
+    with os.scandir(directory) as entries:
+        journals = [x.path for x in entries if is_journal_name(x.name)]
+    if len(journals) == 0:
+        return None
+    return max(journals, key=journal_sort_key)
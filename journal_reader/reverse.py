@@ -0,0 +1,31 @@
+import mmap
+import os
+from typing import Iterator
+
+
+def complete_length(path: str) -> int:
+    """Offset just past the last newline, i.e. the end of the last complete line."""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped.rfind(b"\n") + 1
+
+
+def iter_lines_reversed(path: str) -> Iterator[str]:
+    """
+    Yield a file's complete lines from last to first through a memory map, so only the
+    tail of the file is paged in when the caller stops early.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # anything after the last newline is still being written
+            end = mapped.rfind(b"\n")
+            while end > 0:
+                start = mapped.rfind(b"\n", 0, end) + 1
+                line = mapped[start:end]
+                if line.strip():
+                    yield line.decode("utf-8", errors="replace")
+                end = start - 1
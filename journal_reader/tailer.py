@@ -0,0 +1,59 @@
+import os
+from dataclasses import dataclass
+
+
+@dataclass
+class TailState:
+    offset: int = 0
+    inode: int = 0
+    buffer: bytes = b""
+
+
+class JournalTailer:
+    """
+    Keeps a byte offset and partial-line buffer per journal file, so each read only
+    touches the bytes appended since the last one.
+    """
+
+    def __init__(self) -> None:
+        self.states: dict[str, TailState] = {}
+
+    def forget(self, path: str) -> None:
+        self.states.pop(path, None)
+
+    def seek(self, path: str, offset: int, inode: int) -> None:
+        """Resume tailing from a known line boundary, e.g. one restored from a cache."""
+        self.states[path] = TailState(offset=offset, inode=inode)
+
+    def consumed(self, path: str) -> int:
+        """Offset of the end of the last complete line handed out for this file."""
+        state = self.states.get(path)
+        if state is None:
+            return 0
+        return state.offset - len(state.buffer)
+
+    def read_new_lines(self, path: str) -> list[str]:
+        """Return every complete line appended to the file since the previous call."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.forget(path)
+            return []
+
+        state = self.states.get(path)
+        if state is None or state.inode != stat.st_ino or stat.st_size < state.offset:
+            # new, rotated or truncated file: start over from the top
+            state = TailState(inode=stat.st_ino)
+            self.states[path] = state
+        if stat.st_size == state.offset:
+            return []
+
+        with open(path, "rb") as file:
+            file.seek(state.offset)
+            chunk = file.read()
+        state.offset += len(chunk)
+
+        *complete, state.buffer = (state.buffer + chunk).split(b"\n")
+        return [
+            line.decode("utf-8", errors="replace") for line in complete if line.strip()
+        ]
@@ -0,0 +1,27 @@
+from journal_reader.batching import EventBatcher
+from journal_reader.journal_models import JournalEvent
+from shapes import event_factory, scan_event_factory
+
+
+def test_events_in_window_are_delivered_together() -> None:
+    batches: list[list[JournalEvent]] = []
+    batcher = EventBatcher(batches.append, window=60)
+
+    batcher.add([scan_event_factory(BodyID=1)])
+    batcher.add([scan_event_factory(BodyID=2), scan_event_factory(BodyID=3)])
+    assert batches == []
+
+    batcher.flush()
+    assert len(batches) == 1
+    assert [getattr(x, "BodyID") for x in batches[0]] == [1, 2, 3]
+    assert batcher.timer is None
+
+
+def test_zero_window_delivers_immediately() -> None:
+    batches: list[list[JournalEvent]] = []
+    batcher = EventBatcher(batches.append, window=0)
+
+    batcher.add([event_factory(event="Liftoff")])
+    batcher.add([])
+
+    assert len(batches) == 1
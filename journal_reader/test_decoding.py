@@ -0,0 +1,65 @@
+import json
+from typing import Any, Literal
+
+import pytest
+
+from journal_reader import decoding
+from journal_reader.decoding import decode_event, peek_event_type, set_json_backend
+from journal_reader.journal_models import event_mapping
+
+
+@pytest.fixture
+def counting_backend() -> Any:
+    calls: list[str] = []
+
+    def loads(line: str) -> Any:
+        calls.append(line)
+        return json.loads(line)
+
+    set_json_backend(loads)
+    yield calls
+    set_json_backend()
+
+
+def test_peek_event_type() -> None:
+    line = '{ "timestamp":"2024-06-09T00:56:01Z", "event":"Music", "MusicTrack":"x" }'
+    assert peek_event_type(line) == "Music"
+    assert peek_event_type("not a journal line") is None
+
+
+def test_unmapped_events_skip_json_decode(counting_backend: list[str]) -> None:
+    line = '{ "timestamp":"2024-06-09T00:56:01Z", "event":"Music", "MusicTrack":"x" }'
+    assert decode_event(line) is None
+    assert counting_backend == []
+
+
+def test_mapped_events_use_configured_backend(counting_backend: list[str]) -> None:
+    line = (
+        '{ "timestamp":"2024-06-09T01:03:12Z", "event":"DiscoveryScan", '
+        '"SystemAddress":12345, "Bodies":4 }'
+    )
+    event = decode_event(line)
+
+    assert event is not None and event.event == "DiscoveryScan"
+    assert counting_backend == [line]
+
+
+def test_set_json_backend_restores_direct_validation() -> None:
+    set_json_backend(lambda line: {})
+    set_json_backend()
+    assert decoding.json_loads is None
+
+
+def test_union_tags_match_event_mapping() -> None:
+    for name, event_class in event_mapping.items():
+        assert event_class.model_fields["event"].annotation == Literal[name]
+
+
+def test_unusual_layout_falls_back_to_full_parse() -> None:
+    line = json.dumps({"Bodies": 4, "SystemAddress": 12345})
+    assert decode_event(line) is None
+
+    spaced = '{"timestamp": "2024-06-09T01:03:12Z", "event" :\n "DiscoveryScan"}'
+    with pytest.raises(ValueError):
+        # mapped, but missing required fields
+        decode_event(spaced)
@@ -0,0 +1,76 @@
+import json
+import tracemalloc
+
+from journal_reader.decoding import decode_event
+from journal_reader.event_store import CompactEventStore
+from journal_reader.journal_models import JournalEvent
+from shapes import fss_signal_event_factory, scan_event_factory, signal_count_factory
+
+# measured at ~210 bytes per stored Scan, against ~1.7 KB for the pydantic model
+MAX_BYTES_PER_SCAN = 300
+
+SCAN_LINE = json.dumps(
+    {
+        "timestamp": "2024-06-09T01:02:40Z",
+        "event": "Scan",
+        "ScanType": "Detailed",
+        "BodyName": "Col 285 Sector AB-C d12 3 a",
+        "BodyID": 14,
+        "StarSystem": "Col 285 Sector AB-C d12",
+        "SystemAddress": 123456789012,
+        "DistanceFromArrivalLS": 1234.5,
+        "TerraformState": "",
+        "PlanetClass": "Rocky body",
+        "AtmosphereType": "None",
+        "MassEM": 0.0123,
+        "SurfaceGravity": 1.23,
+        "SurfaceTemperature": 170.5,
+        "Landable": True,
+        "SemiMajorAxis": 12345678.0,
+        "WasDiscovered": False,
+        "WasMapped": False,
+    }
+)
+
+
+def test_store_round_trips_events() -> None:
+    events = [
+        scan_event_factory(BodyID=3, MassEM=0.25),
+        fss_signal_event_factory(Signals=[signal_count_factory(Count=2)]),
+        JournalEvent(timestamp="not a timestamp", event="Liftoff"),
+    ]
+    store = CompactEventStore(events)
+
+    assert len(store) == 3
+    assert list(store) == events
+    assert store[-1] == events[-1]
+    assert store[1:] == events[1:]
+    assert store.event_type(1) == "FSSBodySignals"
+
+
+def test_store_memory_per_event() -> None:
+    event = decode_event(SCAN_LINE)
+    assert event is not None
+    count = 5_000
+    store = CompactEventStore()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        store.append(event)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert (after - before) / count < MAX_BYTES_PER_SCAN
+
+
+def test_store_keeps_recent_events_decoded() -> None:
+    events = [scan_event_factory(BodyID=x) for x in range(1, 5)]
+    store = CompactEventStore(events, cache_size=2)
+
+    # the last two appended are still the same objects
+    assert store[3] is events[3] and store[2] is events[2]
+    assert store.misses == 0
+    # the first two were evicted and have to be rebuilt, once
+    assert store[0] == events[0] and store[0] is store[0]
+    assert (store.hits, store.misses) == (4, 1)
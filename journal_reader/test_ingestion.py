@@ -0,0 +1,25 @@
+from journal_reader.ingestion import IngestionQueue
+from journal_reader.journal_models import JournalEvent
+from shapes import scan_event_factory
+
+
+def test_drain_hands_over_events_in_chunks() -> None:
+    ingestion = IngestionQueue()
+    ingestion.put_batch([scan_event_factory(BodyID=x) for x in range(1, 6)])
+    chunks: list[list[JournalEvent]] = []
+
+    handled = ingestion.drain(chunks.append, budget=1, chunk_size=2)
+
+    assert handled == 5
+    assert [len(x) for x in chunks] == [2, 2, 1]
+    assert ingestion.drain(chunks.append, budget=1) == 0
+
+
+def test_drain_stops_when_budget_is_spent() -> None:
+    ingestion = IngestionQueue()
+    ingestion.put_batch([scan_event_factory(BodyID=x) for x in range(1, 6)])
+
+    handled = ingestion.drain(lambda events: None, budget=0, chunk_size=2)
+
+    assert handled == 2
+    assert ingestion.queue.qsize() == 3
@@ -0,0 +1,186 @@
+from pathlib import Path
+
+from journal_reader.cache import JournalCache
+from journal_reader.journal_reader import JournalReader, Log
+from journal_reader.mapped_store import MappedEventStore
+from shapes import scan_event_factory
+
+JOURNAL_NAME = "Journal.2024-06-09T005518.01.log"
+JOURNAL_LINES = [
+    '{ "timestamp":"2024-06-09T00:55:18Z", "event":"Fileheader", "part":1 }',
+    '{ "timestamp":"2024-06-09T00:56:01Z", "event":"Music", "MusicTrack":"NoTrack" }',
+    '{ "timestamp":"2024-06-09T01:02:40Z", "event":"FSDJump", "StarSystem":"TEST SYSTEM", '
+    '"SystemAddress":12345, "StarPos":[1.0, 2.0, 3.0] }',
+    '{ "timestamp":"2024-06-09T01:03:12Z", "event":"DiscoveryScan", '
+    '"SystemAddress":12345, "Bodies":4 }',
+]
+SALE_LINE = (
+    '{ "timestamp":"2024-06-09T02:00:00Z", "event":"SellExplorationData", '
+    '"Systems":["TEST SYSTEM"], "Discovered":[], "BaseValue":10, "Bonus":0, '
+    '"TotalEarnings":10 }'
+)
+
+
+def write_journal(directory: Path, lines: list[str], name: str = JOURNAL_NAME) -> Path:
+    journal = directory / name
+    journal.write_text("".join(f"{line}\n" for line in lines))
+    return journal
+
+
+def test_compile_journals_skips_unmapped_events(tmp_path: Path) -> None:
+    write_journal(tmp_path, JOURNAL_LINES)
+    reader = JournalReader(file_location=str(tmp_path))
+
+    reader.compile_journals()
+
+    assert [x.event for x in reader.log.events] == ["FSDJump", "DiscoveryScan"]
+
+
+def test_cache_restores_unchanged_and_grown_journals(tmp_path: Path) -> None:
+    journal = write_journal(tmp_path, JOURNAL_LINES)
+    cache_path = str(tmp_path / "cache" / "journals.pickle")
+    JournalReader(
+        file_location=str(tmp_path), cache=JournalCache(cache_path)
+    ).compile_journals()
+
+    cached = JournalReader(file_location=str(tmp_path), cache=JournalCache(cache_path))
+    cached.compile_journals()
+    assert [x.event for x in cached.log.events] == ["FSDJump", "DiscoveryScan"]
+
+    with open(journal, "a") as file:
+        file.write(f"{SALE_LINE}\n")
+    grown = JournalReader(file_location=str(tmp_path), cache=JournalCache(cache_path))
+    grown.compile_journals()
+    assert [x.event for x in grown.log.events] == [
+        "FSDJump",
+        "DiscoveryScan",
+        "SellExplorationData",
+    ]
+
+
+def test_cache_ignores_other_model_fingerprints(tmp_path: Path) -> None:
+    write_journal(tmp_path, JOURNAL_LINES)
+    cache_path = str(tmp_path / "journals.pickle")
+    JournalReader(
+        file_location=str(tmp_path), cache=JournalCache(cache_path)
+    ).compile_journals()
+
+    cache = JournalCache(cache_path)
+    cache.fingerprint = "changed models"
+    cache.load()
+
+    assert cache.entries == {}
+
+
+def test_parallel_compile_matches_serial_order(tmp_path: Path) -> None:
+    write_journal(tmp_path, [SALE_LINE], name="Journal.2024-06-10T120000.01.log")
+    write_journal(tmp_path, JOURNAL_LINES)
+    serial = JournalReader(file_location=str(tmp_path))
+    serial.compile_journals()
+    parallel = JournalReader(file_location=str(tmp_path), workers=2)
+    parallel.compile_journals()
+
+    assert [x.event for x in parallel.log.events] == [
+        "FSDJump",
+        "DiscoveryScan",
+        "SellExplorationData",
+    ]
+    assert parallel.log.events == serial.log.events
+
+
+def test_find_event_distinguishes_same_second_events() -> None:
+    log = Log()
+    first = scan_event_factory(BodyID=1)
+    second = scan_event_factory(BodyID=2)
+    log.append(first)
+
+    assert log.find_event(first) is first
+    assert log.find_event(second) is None
+
+    log.append(second)
+    assert log.find_event(second) is second
+
+
+def test_get_until_event_reverse_stops_at_last_sale(tmp_path: Path) -> None:
+    write_journal(tmp_path, [*JOURNAL_LINES, SALE_LINE, *JOURNAL_LINES[2:]])
+    reader = JournalReader(file_location=str(tmp_path))
+    reader.compile_journals()
+
+    since_sale = reader.log.get_until_event(
+        ["SellExplorationData", "SellOrganicData"], reverse=True
+    )
+    before_sale = reader.log.get_until_event(["SellExplorationData"])
+
+    assert [x.event for x in since_sale] == ["FSDJump", "DiscoveryScan"]
+    assert [x.event for x in before_sale] == ["FSDJump", "DiscoveryScan"]
+    assert reader.log.get_until_event(["SellOrganicData"]) == reader.log.events
+
+
+def test_iter_events_filters_by_type_and_time(tmp_path: Path) -> None:
+    write_journal(tmp_path, JOURNAL_LINES)
+    write_journal(
+        tmp_path,
+        [
+            '{ "timestamp":"2024-06-10T12:00:00Z", "event":"Fileheader", "part":1 }',
+            SALE_LINE.replace("2024-06-09T02:00:00Z", "2024-06-10T12:05:00Z"),
+            JOURNAL_LINES[2].replace("2024-06-09T01:02:40Z", "2024-06-10T12:10:00Z"),
+        ],
+        name="Journal.2024-06-10T120000.01.log",
+    )
+    reader = JournalReader(file_location=str(tmp_path))
+
+    everything = [x.event for x in reader.iter_events()]
+    jumps = [x.timestamp for x in reader.iter_events(types=["FSDJump"])]
+    recent = [x.event for x in reader.iter_events(since="2024-06-10T12:05:00Z")]
+
+    assert everything == ["FSDJump", "DiscoveryScan", "SellExplorationData", "FSDJump"]
+    assert jumps == ["2024-06-09T01:02:40Z", "2024-06-10T12:10:00Z"]
+    assert recent == ["SellExplorationData", "FSDJump"]
+    assert reader.log.events == []
+
+
+def test_load_current_trip_stops_at_last_sale(tmp_path: Path) -> None:
+    write_journal(tmp_path, [*JOURNAL_LINES, SALE_LINE])
+    journal = write_journal(
+        tmp_path, JOURNAL_LINES[2:], name="Journal.2024-06-10T120000.01.log"
+    )
+    reader = JournalReader(file_location=str(tmp_path))
+
+    reader.load_current_trip()
+
+    assert [x.event for x in reader.log.events] == [
+        "SellExplorationData",
+        "FSDJump",
+        "DiscoveryScan",
+    ]
+    assert reader.tailer.read_new_lines(str(journal)) == []
+
+
+def test_lazy_reader_decodes_on_access(tmp_path: Path) -> None:
+    journal = write_journal(tmp_path, [*JOURNAL_LINES, SALE_LINE, *JOURNAL_LINES[2:]])
+    reader = JournalReader(file_location=str(tmp_path), lazy=True)
+    reader.compile_journals()
+    store = reader.log.events
+    assert isinstance(store, MappedEventStore)
+
+    since_sale = reader.log.get_until_event(
+        ["SellExplorationData", "SellOrganicData"], reverse=True
+    )
+    assert [x.event for x in since_sale] == ["FSDJump", "DiscoveryScan"]
+    assert store.misses == 2
+
+    assert reader.log.events[-1] == since_sale[-1]
+    assert store.hits == 1
+    assert reader.log.find_event(JOURNAL_LINES[2], reverse=True) == since_sale[0]
+    # only entries sharing the timestamp and type were looked at, from the LRU
+    assert store.misses == 2
+
+    with open(journal, "a") as file:
+        file.write(f"{SALE_LINE}\n")
+    for line in reader.tailer.read_new_lines(str(journal)):
+        reader.log.append(line)
+    assert [x.event for x in reader.log.events][-2:] == [
+        "DiscoveryScan",
+        "SellExplorationData",
+    ]
+    store.close()
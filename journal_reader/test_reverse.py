@@ -0,0 +1,19 @@
+from pathlib import Path
+
+from journal_reader.reverse import complete_length, iter_lines_reversed
+
+
+def test_iter_lines_reversed_skips_partial_tail(tmp_path: Path) -> None:
+    journal = tmp_path / "Journal.2024-06-09T005518.01.log"
+    journal.write_bytes(b"first\n\nsecond\nthird\npartial")
+
+    assert list(iter_lines_reversed(str(journal))) == ["third", "second", "first"]
+    assert complete_length(str(journal)) == len(b"first\n\nsecond\nthird\n")
+
+
+def test_iter_lines_reversed_empty_file(tmp_path: Path) -> None:
+    journal = tmp_path / "Journal.2024-06-09T005518.01.log"
+    journal.write_bytes(b"")
+
+    assert list(iter_lines_reversed(str(journal))) == []
+    assert complete_length(str(journal)) == 0
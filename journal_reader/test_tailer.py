@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from journal_reader.tailer import JournalTailer
+
+
+def test_reads_only_appended_lines(tmp_path: Path) -> None:
+    journal = tmp_path / "Journal.2024-06-09T005518.01.log"
+    journal.write_bytes(b"first\nsecond\n")
+    tailer = JournalTailer()
+
+    assert tailer.read_new_lines(str(journal)) == ["first", "second"]
+    assert tailer.read_new_lines(str(journal)) == []
+
+    with open(journal, "ab") as file:
+        file.write(b"third\n")
+    assert tailer.read_new_lines(str(journal)) == ["third"]
+
+
+def test_buffers_partial_lines(tmp_path: Path) -> None:
+    journal = tmp_path / "Journal.2024-06-09T005518.01.log"
+    journal.write_bytes(b"first\nsec")
+    tailer = JournalTailer()
+
+    assert tailer.read_new_lines(str(journal)) == ["first"]
+
+    with open(journal, "ab") as file:
+        file.write(b"ond\n")
+    assert tailer.read_new_lines(str(journal)) == ["second"]
+
+
+def test_restarts_after_truncation(tmp_path: Path) -> None:
+    journal = tmp_path / "Journal.2024-06-09T005518.01.log"
+    journal.write_bytes(b"first\nsecond\n")
+    tailer = JournalTailer()
+    tailer.read_new_lines(str(journal))
+
+    journal.write_bytes(b"new\n")
+    assert tailer.read_new_lines(str(journal)) == ["new"]
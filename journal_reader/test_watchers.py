@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from watchdog.events import FileCreatedEvent, FileModifiedEvent
+
+from journal_reader.journal_models import JournalEvent
+from journal_reader.journal_reader import JournalEventHandler, Log
+from journal_reader.test_journal_reader import JOURNAL_LINES, SALE_LINE, write_journal
+from journal_reader.watchers import ActiveJournalHandler, JournalPoller
+
+NEXT_JOURNAL = "Journal.2024-06-10T120000.01.log"
+
+
+def collecting_handler() -> tuple[JournalEventHandler, list[JournalEvent]]:
+    delivered: list[JournalEvent] = []
+    handler = JournalEventHandler(Log(), batch_window=0)
+    handler.set_sink(delivered.extend)
+    return handler, delivered
+
+
+def test_active_handler_ignores_companion_files(tmp_path: Path) -> None:
+    journal = write_journal(tmp_path, JOURNAL_LINES)
+    status = tmp_path / "Status.json"
+    status.write_text("{}")
+    handler, delivered = collecting_handler()
+    active = ActiveJournalHandler(handler, str(tmp_path))
+
+    active.on_modified(FileModifiedEvent(str(status)))
+    assert delivered == []
+
+    active.on_modified(FileModifiedEvent(str(journal)))
+    assert [x.event for x in delivered] == ["FSDJump", "DiscoveryScan"]
+
+
+def test_active_handler_follows_new_journal(tmp_path: Path) -> None:
+    write_journal(tmp_path, JOURNAL_LINES)
+    handler, delivered = collecting_handler()
+    active = ActiveJournalHandler(handler, str(tmp_path))
+
+    new_journal = write_journal(tmp_path, [SALE_LINE], name=NEXT_JOURNAL)
+    active.on_created(FileCreatedEvent(str(new_journal)))
+
+    assert active.active == str(new_journal)
+    assert [x.event for x in delivered] == [
+        "FSDJump",
+        "DiscoveryScan",
+        "SellExplorationData",
+    ]
+
+
+def test_poller_tails_active_and_new_journals(tmp_path: Path) -> None:
+    journal = write_journal(tmp_path, JOURNAL_LINES[:2])
+    handler, delivered = collecting_handler()
+    poller = JournalPoller(handler, str(tmp_path), scan_every=1)
+
+    poller.poll_once()
+    assert delivered == []
+
+    with open(journal, "a") as file:
+        file.write(f"{JOURNAL_LINES[2]}\n")
+    write_journal(tmp_path, [SALE_LINE], name=NEXT_JOURNAL)
+    poller.poll_once()
+
+    assert [x.event for x in delivered] == ["FSDJump", "SellExplorationData"]
@@ -0,0 +1,79 @@
+import time
+from pathlib import Path
+
+from journal_reader.test_journal_reader import JOURNAL_LINES, SALE_LINE, write_journal
+from journal_reader.worker import ParserWorker, SharedRingBuffer
+
+
+def test_ring_buffer_wraps_around() -> None:
+    ring = SharedRingBuffer(capacity=32)
+    try:
+        for i in range(10):
+            payload = bytes([i]) * (5 + i % 7)
+            assert ring.write(payload)
+            assert ring.read() == payload
+        assert ring.read() is None
+    finally:
+        ring.close()
+
+
+def test_ring_buffer_refuses_when_full() -> None:
+    ring = SharedRingBuffer(capacity=16)
+    try:
+        assert ring.write(b"12345678")
+        assert not ring.write(b"12345678")
+        assert ring.read() == b"12345678"
+        assert ring.write(b"12345678")
+    finally:
+        ring.close()
+
+
+def test_worker_publishes_current_trip(tmp_path: Path) -> None:
+    write_journal(tmp_path, [*JOURNAL_LINES, SALE_LINE, *JOURNAL_LINES[2:]])
+    worker = ParserWorker(file_location=str(tmp_path))
+    try:
+        worker.start(timeout=30)
+        assert [x.event for x in worker.log.events] == ["FSDJump", "DiscoveryScan"]
+    finally:
+        worker.stop()
+
+
+def test_worker_passes_reader_options_on(tmp_path: Path) -> None:
+    write_journal(tmp_path, JOURNAL_LINES)
+    write_journal(
+        tmp_path,
+        [SALE_LINE, *JOURNAL_LINES[2:]],
+        name="Journal.2024-06-10T120000.01.log",
+    )
+    worker = ParserWorker(
+        file_location=str(tmp_path),
+        full_history=True,
+        lazy=True,
+        workers=2,
+        monitor_mode="poll",
+    )
+    try:
+        worker.start(timeout=30)
+        assert [x.event for x in worker.log.events] == ["FSDJump", "DiscoveryScan"]
+    finally:
+        worker.stop()
+    assert not worker.process.is_alive()
+
+
+def test_worker_keeps_live_events_until_there_is_a_sink(tmp_path: Path) -> None:
+    journal = write_journal(tmp_path, JOURNAL_LINES)
+    worker = ParserWorker(file_location=str(tmp_path), monitor_mode="poll")
+    received: list[str] = []
+    try:
+        worker.start(timeout=30)
+        with journal.open("a") as file:
+            file.write(f"{JOURNAL_LINES[2]}\n")
+        # long enough for the poller to pick it up and publish it
+        time.sleep(1.5)
+        worker.set_sink(lambda events: received.extend(x.event for x in events))
+        deadline = time.monotonic() + 10
+        while len(received) == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert received == ["FSDJump"]
+    finally:
+        worker.stop()
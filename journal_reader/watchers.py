@@ -0,0 +1,97 @@
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+
+from journal_reader.names import is_journal_name, journal_sort_key, newest_journal
+
+if TYPE_CHECKING:
+    from journal_reader.journal_reader import JournalEventHandler
+
+
+class ActiveJournalHandler(FileSystemEventHandler):
+    """
+    Follows only the journal the game is currently writing. Writes to companion files
+    are dropped with one string comparison, and a newly created journal takes over as
+    the active one.
+    """
+
+    def __init__(self, handler: "JournalEventHandler", directory: str) -> None:
+        super().__init__()
+        self.handler = handler
+        self.active = newest_journal(directory)
+
+    def switch_to(self, path: str) -> None:
+        if self.active is not None and path != self.active:
+            # pick up anything written to the old journal before the game moved on
+            self.handler.ingest(self.active)
+        self.active = path
+
+    def on_created(self, event: FileSystemEvent) -> None:
+        path = str(event.src_path)
+        if event.is_directory or not is_journal_name(os.path.basename(path)):
+            return
+        if self.active is None or journal_sort_key(path) >= journal_sort_key(
+            self.active
+        ):
+            self.switch_to(path)
+            self.handler.ingest(path)
+
+    def on_modified(self, event: FileSystemEvent) -> None:
+        if event.src_path == self.active:
+            self.handler.ingest(self.active)
+
+
+class JournalPoller(threading.Thread):
+    """
+    Polling backend for filesystems where change notifications are unreliable (network
+    shares, some VMs). Each tick stats the active journal and only lists the directory
+    every `scan_every` ticks to notice a new one. Has the same start/stop/join shape as
+    a watchdog observer.
+    """
+
+    def __init__(
+        self,
+        handler: "JournalEventHandler",
+        directory: str,
+        interval: float = 0.5,
+        scan_every: int = 4,
+    ) -> None:
+        super().__init__(daemon=True)
+        self.handler = handler
+        self.directory = directory
+        self.interval = interval
+        self.scan_every = scan_every
+        self.active = newest_journal(directory)
+        self.last_size = -1
+        self.ticks = 0
+        self.stopped = threading.Event()
+
+    def poll_once(self) -> None:
+        if self.ticks % self.scan_every == 0:
+            newest = newest_journal(self.directory)
+            if newest is not None and newest != self.active:
+                if self.active is not None:
+                    self.handler.ingest(self.active)
+                self.active = newest
+                self.last_size = -1
+        self.ticks += 1
+
+        if self.active is None:
+            return
+        try:
+            size = os.stat(self.active).st_size
+        except FileNotFoundError:
+            self.active = None
+            return
+        if size != self.last_size:
+            self.last_size = size
+            self.handler.ingest(self.active)
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.poll_once()
+
+    def stop(self) -> None:
+        self.stopped.set()
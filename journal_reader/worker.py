@@ -0,0 +1,237 @@
+import multiprocessing
+import pickle
+import struct
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Event
+from typing import Callable
+
+from journal_reader.cache import JournalCache
+from journal_reader.journal_models import JournalEvent
+from journal_reader.journal_reader import (
+    TRIP_BOUNDARY_EVENTS,
+    JournalReader,
+    Log,
+    MonitorMode,
+)
+
+HEADER = struct.Struct("<QQ")
+LENGTH = struct.Struct("<I")
+SNAPSHOT_END = b""
+"""Empty record the worker sends once the startup history has been published."""
+
+
+class SharedRingBuffer:
+    """
+    Single-producer/single-consumer ring of length-prefixed records in shared memory.
+    The header holds two monotonically increasing counters: bytes written (only the
+    producer moves it) and bytes read (only the consumer moves it).
+    """
+
+    def __init__(
+        self, name: str | None = None, capacity: int = 4 * 1024 * 1024
+    ) -> None:
+        if name is None:
+            self.memory = SharedMemory(create=True, size=HEADER.size + capacity)
+            HEADER.pack_into(self.memory.buf, 0, 0, 0)
+            self.owner = True
+        else:
+            self.memory = SharedMemory(name=name)
+            self.owner = False
+        self.capacity = self.memory.size - HEADER.size
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def positions(self) -> tuple[int, int]:
+        written, read = HEADER.unpack_from(self.memory.buf, 0)
+        return written, read
+
+    def copy_in(self, position: int, data: bytes) -> None:
+        start = position % self.capacity
+        first = min(len(data), self.capacity - start)
+        base = HEADER.size
+        self.memory.buf[base + start : base + start + first] = data[:first]
+        if first < len(data):
+            self.memory.buf[base : base + len(data) - first] = data[first:]
+
+    def copy_out(self, position: int, length: int) -> bytes:
+        start = position % self.capacity
+        first = min(length, self.capacity - start)
+        base = HEADER.size
+        data = bytes(self.memory.buf[base + start : base + start + first])
+        if first < length:
+            data += bytes(self.memory.buf[base : base + length - first])
+        return data
+
+    def write(self, payload: bytes) -> bool:
+        """Append a record, or return False if there isn't room for it yet."""
+        size = LENGTH.size + len(payload)
+        if size > self.capacity:
+            raise ValueError(f"record of {size} bytes can never fit in the ring")
+        written, read = self.positions()
+        if self.capacity - (written - read) < size:
+            return False
+        self.copy_in(written, LENGTH.pack(len(payload)) + payload)
+        # publish only after the record is fully copied
+        struct.pack_into("<Q", self.memory.buf, 0, written + size)
+        return True
+
+    def read(self) -> bytes | None:
+        written, read = self.positions()
+        if written == read:
+            return None
+        (length,) = LENGTH.unpack(self.copy_out(read, LENGTH.size))
+        payload = self.copy_out(read + LENGTH.size, length)
+        struct.pack_into("<Q", self.memory.buf, 8, read + LENGTH.size + length)
+        return payload
+
+    def close(self) -> None:
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def publish(ring: SharedRingBuffer, events: list[JournalEvent], stop: Event) -> None:
+    """Pickle events into the ring, splitting batches that are too big for it."""
+    if len(events) == 0:
+        return
+    payload = pickle.dumps(events, protocol=pickle.HIGHEST_PROTOCOL)
+    if LENGTH.size + len(payload) > ring.capacity and len(events) > 1:
+        middle = len(events) // 2
+        publish(ring, events[:middle], stop)
+        publish(ring, events[middle:], stop)
+        return
+    while not ring.write(payload):
+        if stop.is_set():
+            return
+        time.sleep(0.005)
+
+
+def run_parser(
+    ring_name: str,
+    file_location: str | None,
+    full_history: bool,
+    stop: Event,
+    lazy: bool = False,
+    use_cache: bool = False,
+    workers: int = 1,
+    monitor_mode: MonitorMode = "active",
+) -> None:
+    """Worker process: owns the JournalReader/Log and ships parsed events to the GUI."""
+    ring = SharedRingBuffer(ring_name)
+    reader = JournalReader(
+        file_location=file_location,
+        cache=JournalCache() if use_cache else None,
+        workers=workers,
+        lazy=lazy,
+    )
+    if full_history:
+        reader.compile_journals()
+    else:
+        reader.load_current_trip()
+    publish(ring, reader.log.get_until_event(TRIP_BOUNDARY_EVENTS, reverse=True), stop)
+    while not ring.write(SNAPSHOT_END):
+        time.sleep(0.005)
+
+    # batches can be flushed from more than one timer thread, keep a single producer
+    lock = threading.Lock()
+
+    def sink(events: list[JournalEvent]) -> None:
+        with lock:
+            publish(ring, events, stop)
+
+    reader.set_sink(sink)
+    observer = reader.monitor_journals(monitor_mode)
+    stop.wait()
+    observer.stop()
+    observer.join()
+    ring.close()
+
+
+class ParserWorker:
+    """
+    GUI-side handle on the parser process. Stands in for a JournalReader: `log` holds the
+    startup trip history and `set_sink` receives live batches from a pump thread. The
+    pump only runs once there's a sink, until then batches wait in the ring.
+    """
+
+    def __init__(
+        self,
+        file_location: str | None = None,
+        full_history: bool = False,
+        lazy: bool = False,
+        use_cache: bool = False,
+        workers: int = 1,
+        monitor_mode: MonitorMode = "active",
+        capacity: int = 4 * 1024 * 1024,
+    ) -> None:
+        self.file_location = file_location
+        self.full_history = full_history
+        self.ring = SharedRingBuffer(capacity=capacity)
+        self.log = Log()
+        self.sink: Callable[[list[JournalEvent]], None] | None = None
+        self.stop_event = multiprocessing.Event()
+        self.process = multiprocessing.Process(
+            target=run_parser,
+            args=(self.ring.name, file_location, full_history, self.stop_event),
+            kwargs={
+                "lazy": lazy,
+                "use_cache": use_cache,
+                "workers": workers,
+                "monitor_mode": monitor_mode,
+            },
+            # daemonic processes can't start the parsing pool, stop() ends it instead
+            daemon=False,
+        )
+        self.pump: threading.Thread | None = None
+        self.started = False
+
+    def start(self, timeout: float | None = None) -> None:
+        """Start the worker and wait until it has published the startup history."""
+        self.process.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            record = self.ring.read()
+            if record == SNAPSHOT_END:
+                break
+            if record is not None:
+                for event in pickle.loads(record):
+                    self.log.append(event)
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("journal parser worker didn't send its snapshot")
+            if not self.process.is_alive():
+                raise RuntimeError("journal parser worker exited during startup")
+            time.sleep(0.005)
+        self.started = True
+        self.start_pump()
+
+    def set_sink(self, sink: Callable[[list[JournalEvent]], None]) -> None:
+        self.sink = sink
+        self.start_pump()
+
+    def start_pump(self) -> None:
+        if self.started and self.sink is not None and self.pump is None:
+            self.pump = threading.Thread(
+                target=self.run_pump, args=(self.sink,), daemon=True
+            )
+            self.pump.start()
+
+    def run_pump(self, sink: Callable[[list[JournalEvent]], None]) -> None:
+        while not self.stop_event.is_set():
+            record = self.ring.read()
+            if record is None:
+                time.sleep(0.02)
+                continue
+            events: list[JournalEvent] = pickle.loads(record)
+            sink(events)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.process.join(timeout=5)
+        if self.pump is not None and self.pump.is_alive():
+            self.pump.join(timeout=1)
+        self.ring.close()
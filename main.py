@@ -1,23 +1,122 @@
+import argparse
+import os
+
 import ttkbootstrap as ttk
 
+from db.compact import CompactStore
 from db.galaxy import Galaxy
-from gui import GUI
-from journal_reader.journal_reader import JournalReader
-
-root = ttk.Window(themename="minty")
+from db.snapshot import load_snapshot, save_snapshot
+from db.store import GalaxyStore, open_galaxy
+from gui import DEFAULT_JUMP_RANGE, GUI
+from journal_reader.cache import JournalCache
+from journal_reader.journal_reader import JournalReader, MonitorMode
+from journal_reader.worker import ParserWorker
 
-galaxy = Galaxy()
-reader = JournalReader()
-reader.compile_journals()
-observer = reader.monitor_journals()
+# guarded so process-pool workers spawned on Windows don't re-run the app
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--full-history",
+        action="store_true",
+        help="parse every journal instead of only the current trip",
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="with --full-history, index journals and decode events only when read",
+    )
+    parser.add_argument(
+        "--parser-process",
+        action="store_true",
+        help="parse journals in a separate process to keep the UI responsive",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="poll the journal instead of relying on file system notifications",
+    )
+    parser.add_argument(
+        "--galaxy-db",
+        metavar="PATH",
+        help="keep the galaxy in a sqlite database so it survives restarts",
+    )
+    parser.add_argument(
+        "--compact-galaxy",
+        action="store_true",
+        help="keep systems you're not in as compact records to save memory",
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="load the galaxy from a snapshot file, and save it there on exit"
+        " (not with --galaxy-db or --compact-galaxy)",
+    )
+    parser.add_argument(
+        "--jump-range",
+        type=float,
+        default=DEFAULT_JUMP_RANGE,
+        help="ship jump range in light years, for route planning",
+    )
+    args = parser.parse_args()
+    if args.lazy and not args.full_history:
+        parser.error("--lazy only applies to --full-history")
+    if args.snapshot and (args.galaxy_db or args.compact_galaxy):
+        parser.error(
+            "--snapshot can't be combined with --galaxy-db or --compact-galaxy"
+        )
 
-gui = GUI(reader, root, galaxy)
-gui.build_trip_snapshot()
-gui.setup_tabs()
-gui.build_tab_contents()
+    root = ttk.Window(themename="minty")
 
+    store = GalaxyStore(args.galaxy_db) if args.galaxy_db else None
+    if store is not None:
+        galaxy = open_galaxy(store)
+    elif args.snapshot and os.path.exists(args.snapshot):
+        galaxy = load_snapshot(args.snapshot)
+    elif args.compact_galaxy:
+        galaxy = open_galaxy(CompactStore())
+    else:
+        galaxy = Galaxy()
+    workers = os.cpu_count() or 1
+    monitor_mode: MonitorMode = "poll" if args.poll else "active"
+    if args.parser_process:
+        worker = ParserWorker(
+            full_history=args.full_history,
+            lazy=args.lazy,
+            use_cache=True,
+            workers=workers,
+            monitor_mode=monitor_mode,
+        )
+        worker.start()
+        gui = GUI(worker, root, galaxy, args.jump_range)
+    else:
+        reader = JournalReader(cache=JournalCache(), workers=workers, lazy=args.lazy)
+        if args.full_history:
+            reader.compile_journals()
+        else:
+            reader.load_current_trip()
+        gui = GUI(reader, root, galaxy, args.jump_range)
 
-root.mainloop()
+    observer = None
+    try:
+        gui.build_trip_snapshot()
+        if not args.parser_process:
+            # lines tailed before the snapshot was built would be in it and in the
+            # GUI's queue, so the trip would see them twice
+            observer = reader.monitor_journals(monitor_mode)
+        gui.setup_tabs()
+        gui.build_tab_contents()
 
-observer.stop()
-observer.join()
+        root.mainloop()
+    finally:
+        # the parser process isn't a daemon, it has to be stopped even on errors
+        if args.parser_process:
+            worker.stop()
+        elif observer is not None:
+            observer.stop()
+            observer.join()
+    # the snapshot is read through the galaxy's store, save it before that's closed
+    if args.snapshot:
+        save_snapshot(galaxy, args.snapshot)
+    if store is not None:
+        galaxy.flush()
+        store.close()
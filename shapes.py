@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Sequence
 from conftest import PRIMARY_PLANET_ID, PRIMARY_SYSTEM_ADDRESS
 from db.galaxy import BioSignal, Planet
 from journal_reader.journal_models import (
@@ -107,7 +107,7 @@ def planet_factory(
     gravity: float | None = None,
     mass: float | None = None,
     signal_count: int | None = None,
-    signals: list[BioSignal] = [],
+    signals: Sequence[BioSignal] = (),
 ) -> Planet:
     return Planet(
         system_name=StarSystem or "DONT CARE",
@@ -124,5 +124,5 @@ def planet_factory(
         surface_gravity=(gravity or 0) * 10,
         mass_em=mass,
         signal_count=signal_count or 0,
-        signals=signals,
+        signals=tuple(signals),
     )
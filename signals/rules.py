@@ -0,0 +1,118 @@
+from bisect import bisect_left, bisect_right
+from typing import Sequence
+
+from signals.signals import Flora, species_list
+
+
+def accumulate_masks(bits: list[int], reverse: bool = False) -> list[int]:
+    """masks[i] is the union of bits[i:] (reverse) or bits[:i], with one extra entry."""
+    masks = [0] * (len(bits) + 1)
+    if reverse:
+        for i in range(len(bits) - 1, -1, -1):
+            masks[i] = masks[i + 1] | bits[i]
+    else:
+        for i, bit in enumerate(bits):
+            masks[i + 1] = masks[i] | bit
+    return masks
+
+
+class Thresholds:
+    """
+    Species bounds on one value, sorted so a lookup is a bisect plus one precomputed
+    mask of the species the value satisfies. Species without this bound always pass.
+    """
+
+    def __init__(self, bounds: list[tuple[float, int]], unbounded: int, upper: bool):
+        bounds.sort()
+        self.values = [x for x, _ in bounds]
+        self.upper = upper
+        bits = [1 << i for _, i in bounds]
+        if upper:
+            # value <= bound: species from the first bound >= value onwards
+            self.masks = [x | unbounded for x in accumulate_masks(bits, reverse=True)]
+        else:
+            # value >= bound: species up to the last bound <= value
+            self.masks = [x | unbounded for x in accumulate_masks(bits)]
+
+    def allowed(self, value: float) -> int:
+        if self.upper:
+            return self.masks[bisect_left(self.values, value)]
+        return self.masks[bisect_right(self.values, value)]
+
+
+class SpeciesIndex:
+    """
+    The species rules compiled into bitmasks, bit `i` standing for `species[i]`. A planet's
+    candidates are the intersection of its atmosphere's mask and the masks its gravity and
+    temperature fall into, so nothing walks the whole catalog per planet.
+    """
+
+    def __init__(self, species: Sequence[Flora]) -> None:
+        self.species = list(species)
+        self.positions = {(x.genus, x.species): i for i, x in enumerate(self.species)}
+        self.by_atmosphere: dict[str, int] = {}
+        gravity: list[tuple[float, int]] = []
+        max_temperature: list[tuple[float, int]] = []
+        min_temperature: list[tuple[float, int]] = []
+        every = (1 << len(self.species)) - 1
+        no_gravity_limit = no_max_temperature = no_min_temperature = every
+
+        for i, sp in enumerate(self.species):
+            bit = 1 << i
+            for atmosphere in sp.atmosphere_requirement or []:
+                self.by_atmosphere[atmosphere] = (
+                    self.by_atmosphere.get(atmosphere, 0) | bit
+                )
+            if sp.max_gravity is not None:
+                gravity.append((sp.max_gravity, i))
+                no_gravity_limit &= ~bit
+            if sp.max_temperature_k is not None:
+                max_temperature.append((sp.max_temperature_k, i))
+                no_max_temperature &= ~bit
+            if sp.min_temperature_k is not None:
+                min_temperature.append((sp.min_temperature_k, i))
+                no_min_temperature &= ~bit
+
+        self.gravity = Thresholds(gravity, no_gravity_limit, upper=True)
+        self.max_temperature = Thresholds(
+            max_temperature, no_max_temperature, upper=True
+        )
+        self.min_temperature = Thresholds(
+            min_temperature, no_min_temperature, upper=False
+        )
+
+    def candidates(
+        self, atmosphere: str | None, gravity: float, temperature: float | None
+    ) -> list[Flora]:
+        """Species a planet could have, in catalog order."""
+        mask = self.by_atmosphere.get(atmosphere or "", 0)
+        if mask == 0:
+            return []
+        mask &= self.gravity.allowed(gravity)
+        if temperature is not None:
+            mask &= self.max_temperature.allowed(temperature)
+            mask &= self.min_temperature.allowed(temperature)
+
+        found: list[Flora] = []
+        while mask:
+            low = mask & -mask
+            found.append(self.species[low.bit_length() - 1])
+            mask ^= low
+        return found
+
+
+species_index = SpeciesIndex(species_list)
+
+
+def rebuild_species_index() -> SpeciesIndex:
+    """Recompile the rules after `species_list` or one of its entries was changed."""
+    global species_index
+    species_index = SpeciesIndex(species_list)
+    return species_index
+
+
+def get_species_index() -> SpeciesIndex:
+    # species added or removed since the last build, edits in place need a rebuild
+    if len(species_index.species) != len(species_list):
+        return rebuild_species_index()
+    return species_index
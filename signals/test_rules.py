@@ -0,0 +1,59 @@
+import itertools
+
+from signals.rules import SpeciesIndex, get_species_index
+from signals.signals import Flora, atmospheres, species_list
+
+
+def linear_scan(
+    species: list[Flora],
+    atmosphere: str | None,
+    gravity: float,
+    temperature: float | None,
+) -> list[Flora]:
+    """The per-species checks the index replaces."""
+    found = []
+    for sp in species:
+        if not sp.atmosphere_requirement or atmosphere not in sp.atmosphere_requirement:
+            continue
+        if sp.max_gravity is not None and gravity > sp.max_gravity:
+            continue
+        if temperature is not None:
+            if sp.max_temperature_k is not None and temperature > sp.max_temperature_k:
+                continue
+            if sp.min_temperature_k is not None and temperature < sp.min_temperature_k:
+                continue
+        found.append(sp)
+    return found
+
+
+def test_index_matches_linear_scan() -> None:
+    catalog = species_list + [
+        Flora(
+            genus="Testus",
+            min_distance_between=100,
+            atmosphere_requirement=["Ammonia", "Nitrogen"],
+            min_temperature_k=150,
+            max_temperature_k=190,
+            max_gravity=0.27,
+        ),
+        Flora(genus="Nowhere", min_distance_between=100, atmosphere_requirement=[]),
+    ]
+    index = SpeciesIndex(catalog)
+    for atmosphere, gravity, temperature in itertools.product(
+        [*atmospheres, None], [0, 0.27, 0.28, 3], [None, 100, 150, 190, 191]
+    ):
+        assert index.candidates(atmosphere, gravity, temperature) == linear_scan(
+            catalog, atmosphere, gravity, temperature
+        )
+
+
+def test_rebuilt_when_catalog_grows() -> None:
+    extra = Flora(
+        genus="Testus", min_distance_between=100, atmosphere_requirement=["Argon"]
+    )
+    species_list.append(extra)
+    try:
+        assert extra in get_species_index().candidates("Argon", 0.1, None)
+    finally:
+        species_list.remove(extra)
+    assert extra not in get_species_index().candidates("Argon", 0.1, None)
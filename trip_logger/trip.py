@@ -1,5 +1,5 @@
-from typing import Callable, Sequence
-from db.galaxy import Galaxy, Planet, System
+from typing import Callable, Iterable, Literal
+from db.galaxy import BodyKey, Galaxy, Planet
 from journal_reader.journal_models import (
     DSSEvent,
     DSSSignalEvent,
@@ -7,18 +7,16 @@ from journal_reader.journal_models import (
     FSSSignalEvent,
     JournalEvent,
     ScanEvent,
+    ScanOrganicEvent,
 )
 
+try:
+    from db import valuation
+except ImportError:  # numpy is optional
+    valuation = None  # type: ignore[assignment]
 
-def is_new_scan(system: System, event: ScanEvent) -> bool:
-    if event.ScanType != "Detailed":
-        return False
-    body = system.planets.get(event.BodyID, None)
-    if body is None:
-        return True
-    if not body.detailed_scan_by_player:
-        return True
-    return False
+# below this many planets the cached per-planet values sum faster than numpy
+VECTOR_TOTAL_MIN_PLANETS = 2000
 
 
 class Trip:
@@ -26,7 +24,7 @@ class Trip:
         self,
         galaxy: Galaxy,
         refresh_func: Callable[[], None],
-        add_body_to_ui: Callable[[Planet], None],
+        add_body_to_ui: Callable[[BodyKey], None],
         clear_system: Callable[[], None],
     ) -> None:
         self.galaxy = galaxy
@@ -34,36 +32,51 @@ class Trip:
         self.refresh = refresh_func
         self.add_body_to_ui = add_body_to_ui
         self.clear_system = clear_system
-        self.bodies_scanned: list[Planet] = []
-        self.bodies_mapped: list[Planet] = []
+        # a persisted galaxy already knows bodies scanned on earlier trips, so what
+        # counts towards this trip is tracked here rather than on the planets. Planets
+        # are looked up through the galaxy, a stored one may have reloaded them since.
+        self.scanned: list[BodyKey] = []
+        self.mapped: list[BodyKey] = []
+        self.scanned_keys: set[BodyKey] = set()
+
+    @staticmethod
+    def total(
+        planets: list[Planet], field: Literal["base", "mapped", "bonuses"]
+    ) -> float:
+        if valuation is not None and len(planets) >= VECTOR_TOTAL_MIN_PLANETS:
+            values = valuation.planet_values(planets)
+            return valuation.sequential_sum(getattr(values, field))
+        return sum(getattr(x.cartographic_values_actual, field) for x in planets)
+
+    @property
+    def bodies_scanned(self) -> list[Planet]:
+        return self.galaxy.planets(self.scanned)
+
+    @property
+    def bodies_mapped(self) -> list[Planet]:
+        return self.galaxy.planets(self.mapped)
 
     @property
     def bodies_scanned_count(self) -> int:
-        return len(self.bodies_scanned)
+        return len(self.scanned)
 
     @property
     def bodies_scanned_value(self) -> int:
-        return round(
-            sum(x.cartographic_values_actual.base for x in self.bodies_scanned)
-        )
+        return round(self.total(self.bodies_scanned, "base"))
 
     @property
     def bodies_mapped_count(self) -> int:
-        return len(self.bodies_mapped)
+        return len(self.mapped)
 
     @property
     def bodies_mapped_value(self) -> int:
-        return round(
-            sum(x.cartographic_values_actual.mapped for x in self.bodies_mapped)
-        )
+        return round(self.total(self.bodies_mapped, "mapped"))
 
     @property
     def bonuses(self) -> int:
-        return round(
-            sum(x.cartographic_values_actual.bonuses for x in self.bodies_scanned)
-        )
+        return round(self.total(self.bodies_scanned, "bonuses"))
 
-    def add_entries(self, events: Sequence[JournalEvent]) -> None:
+    def add_entries(self, events: Iterable[JournalEvent]) -> None:
         for event in events:
             if isinstance(event, FSDJumpEvent):
                 self.galaxy.jump_to_system(event)
@@ -76,33 +89,36 @@ class Trip:
                 and event.PlanetClass is not None
             ):
                 if self.galaxy.current_system:
-                    new_scan = is_new_scan(self.galaxy.current_system, event)
-                    planet = self.galaxy.current_system.add_planet_from_scan(event)
-                    if new_scan is True:
-                        self.bodies_scanned.append(planet)
-                        self.add_body_to_ui(planet)
+                    key = (event.SystemAddress, event.BodyID)
+                    planet = self.galaxy.add_planet_from_scan(event)
+                    if key not in self.scanned_keys:
+                        self.scanned_keys.add(key)
+                        self.scanned.append(key)
+                        self.add_body_to_ui(key)
                     else:
                         planet.update_from_fss(event)
                 continue
 
             if isinstance(event, DSSEvent):
                 if self.galaxy.current_system is not None:
-                    planet = self.galaxy.current_system.planets.get(event.BodyID, None)
-                    if planet is not None:
-                        planet.mapped_by_player = True
-                        self.bodies_mapped.append(planet)
+                    if self.galaxy.map_planet(event) is not None:
+                        self.mapped.append((event.SystemAddress, event.BodyID))
                 continue
 
             if isinstance(event, FSSSignalEvent):
                 if self.galaxy.current_system is not None:
-                    self.galaxy.current_system.add_planet_from_signals(event)
+                    self.galaxy.add_planet_from_signals(event)
                 continue
 
             if isinstance(event, DSSSignalEvent):
                 if self.galaxy.current_system is not None:
-                    planet = self.galaxy.current_system.planets.get(event.BodyID, None)
-                    if planet is not None:
-                        planet.update_signals_from_dss(event)
+                    self.galaxy.update_signals_from_dss(event)
+                continue
+
+            if isinstance(event, ScanOrganicEvent):
+                if self.galaxy.current_system is not None:
+                    self.galaxy.sample_organic(event)
                 continue
 
+        self.galaxy.flush()
         self.refresh()